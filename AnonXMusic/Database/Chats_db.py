@@ -1,4 +1,4 @@
-from AnonXMusic.database import db
+from AnonXMusic.Database import db
 
 chatsdb = db.chats
 
@@ -1,5 +1,3 @@
-import config
-from motor.motor_asyncio import AsyncIOMotorClient as MongoClient
+from AnonXMusic.core.mongo import _mongo_async_ as mongo
 
-mongo = MongoClient(config.MONGO_DB_URI)
 db = mongo.AnonxMusic
@@ -1,23 +1,21 @@
-from pymongo import MongoClient 
-from config import MONGO_DB_URI
+from AnonXMusic.core.mongo import _mongo_async_
 
-DATABASE = MongoClient(MONGO_DB_URI)
-WELCOME_DB = DATABASE["MAIN"]["welcome"]
+WELCOME_DB = _mongo_async_["MAIN"]["welcome"]
 
-def check_welcome_enable(group_id: int):
-    check_status = WELCOME_DB.find_one({"group_id": group_id})
+async def check_welcome_enable(group_id: int):
+    check_status = await WELCOME_DB.find_one({"group_id": group_id})
     if check_status:
         return True
     return False
     
-def add_welcome_enable(group_id: int):
-    check_status = WELCOME_DB.find_one({"group_id": group_id})
+async def add_welcome_enable(group_id: int):
+    check_status = await WELCOME_DB.find_one({"group_id": group_id})
     if check_status:
         return None
-    return WELCOME_DB.insert_one({"group_id": group_id})
+    return await WELCOME_DB.insert_one({"group_id": group_id})
     
-def remove_welcome_enable(group_id: int):
-    check_status = WELCOME_DB.find_one({"group_id": group_id})
+async def remove_welcome_enable(group_id: int):
+    check_status = await WELCOME_DB.find_one({"group_id": group_id})
     if not check_status:
         return None
-    return WELCOME_DB.delete_one({"group_id": group_id})
+    return await WELCOME_DB.delete_one({"group_id": group_id})
@@ -1,43 +1,114 @@
 import asyncio
 import importlib
+import time
 
 from pyrogram import idle
 from pytgcalls.exceptions import NoActiveGroupCall
 
 import config
 from AnonXMusic import LOGGER, app, userbot
+from AnonXMusic.core.balancer import balancer
 from AnonXMusic.core.call import Anony
+from AnonXMusic.core.indexes import ensure_indexes
+from AnonXMusic.core.quality import quality
+from AnonXMusic.core.snapshot import snapshots
+from AnonXMusic.core.writebehind import writer
 from AnonXMusic.misc import sudo
+from AnonXMusic.mongo.afkdb import load_afk_users
 from AnonXMusic.plugins import ALL_MODULES
-from AnonXMusic.utils.database import get_banned_users, get_gbanned
-from config import BANNED_USERS
+from AnonXMusic.utils.database import (
+    load_banned_users,
+    load_chat_settings,
+    load_membership,
+    migrate_authusers,
+    migrate_chat_settings,
+    served_chats,
+    served_users,
+    storage,
+    watch_chat_settings,
+)
+from AnonXMusic.utils.stream.preroll import preroll_loop
+from AnonXMusic.utils.stream.recovery import recover_queues
+
+# (phase, seconds) of the last startup, in order.
+timings = []
+_phase_started = time.monotonic()
+
+
+def phase(name: str):
+    global _phase_started
+    now = time.monotonic()
+    timings.append((name, round(now - _phase_started, 2)))
+    _phase_started = now
+
+
+async def resume_queues():
+    # Waits for every assistant so resumed chats spread over all of them.
+    try:
+        await userbot.started
+    except Exception:
+        pass
+    try:
+        await recover_queues()
+    except Exception as e:
+        LOGGER("AnonXMusic").warning(f"Error resuming saved queues: {e}")
+    snapshots.start()
 
 
 async def init():
-    if (
-        not config.STRING1 and
-        not config.STRING2 and
-        not config.STRING3 and
-        not config.STRING4 and
-        not config.STRING5
-    ):
+    if not config.STRING_SESSIONS:
         LOGGER(__name__).error(
             "Assistant String Sessions or client variables are not defined, exiting..."
         )
         exit()
 
+    phase("imports")
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error creating database indexes: {e}")
+
     await sudo()
+    writer.start()
+    phase("database")
 
     try:
-        users = await get_gbanned()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-        users = await get_banned_users()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
+        await load_banned_users()
     except Exception as e:
         LOGGER(__name__).warning(f"Error loading banned users: {e}")
 
+    try:
+        await load_membership()
+        LOGGER(__name__).info(
+            f"Loaded {len(served_users)} users and {len(served_chats)} chats."
+        )
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error loading served users and chats: {e}")
+
+    try:
+        await load_afk_users()
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error loading AFK users: {e}")
+
+    try:
+        migrated = await migrate_chat_settings()
+        if migrated:
+            LOGGER(__name__).info(f"Migrated settings of {migrated} chats.")
+        loaded = await load_chat_settings(list(served_chats))
+        LOGGER(__name__).info(f"Loaded settings of {loaded} chats.")
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error loading chat settings: {e}")
+
+    try:
+        migrated = await migrate_authusers()
+        if migrated:
+            LOGGER(__name__).info(f"Migrated {migrated} auth users.")
+    except Exception as e:
+        LOGGER(__name__).warning(f"Error migrating auth users: {e}")
+    if config.SETTINGS_CHANGE_STREAM:
+        asyncio.create_task(watch_chat_settings())
+    phase("caches")
+
     await app.start()
 
     for module in ALL_MODULES:
@@ -50,9 +121,15 @@ async def init():
             LOGGER("AnonXMusic.plugins").error(f"❌ Failed to import module '{module}': {e}")
 
     LOGGER("AnonXMusic.plugins").info("✅ Successfully imported all plugin modules.")
+    phase("bot")
 
-    await userbot.start()
-    await Anony.start()
+    await Anony.decorators()
+    # Returns once the first assistant and its calls client are up, the
+    # others keep starting in the background.
+    await userbot.start(
+        on_ready=Anony.start_call, concurrency=config.ASSISTANT_START_CONCURRENCY
+    )
+    phase("first assistant")
 
     try:
         await Anony.stream_call("https://te.legra.ph/file/29f784eb49d230ab62e9e.mp4")
@@ -64,14 +141,26 @@ async def init():
     except Exception as e:
         LOGGER("AnonXMusic").warning(f"⚠️ Stream startup failed: {e}")
 
-    await Anony.decorators()
+    asyncio.create_task(balancer.measure_pings(Anony.calls))
+    asyncio.create_task(preroll_loop())
+    asyncio.create_task(quality.monitor(Anony.upgrade_stream))
+    asyncio.create_task(resume_queues())
+    phase("stream check")
 
+    LOGGER("AnonXMusic").info(
+        "Startup: "
+        + ", ".join(f"{name} {seconds}s" for name, seconds in timings)
+        + f", total {round(sum(seconds for _, seconds in timings), 2)}s"
+    )
     LOGGER("AnonXMusic").info(
         "✅ Billa Music Bot Started Successfully.\nVisit @BillaSpace"
     )
 
     await idle()
 
+    await snapshots.stop()
+    await writer.stop()
+    await storage.close()
     await app.stop()
     await userbot.stop()
 
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import deque
+
+import config
+
+from ..logging import LOGGER
+from .session import sessions
+
+log = LOGGER(__name__)
+
+
+class AssistantBalancer:
+    def __init__(
+        self,
+        ping_weight: float = 0,
+        flood_weight: float = 0,
+        flood_window: float = 600,
+        margin: int = 2,
+    ):
+        # Score of an assistant: active sessions, plus ping_weight per ms of
+        # its last ping, plus flood_weight per FloodWait in flood_window.
+        self.ping_weight = ping_weight
+        self.flood_weight = flood_weight
+        self.flood_window = flood_window
+        # An idle chat moves off its assistant once that one carries at least
+        # margin more sessions than the least loaded one, 0 keeps them sticky.
+        self.margin = margin
+        self.pings = {}
+        self.floods = {}
+        # assistant -> monotonic time until which it is skipped for new calls
+        self.unhealthy = {}
+        # chat id -> (assistant, expiry) for picks whose call is not joined yet,
+        # so a burst of /play does not land on the same assistant.
+        self.pending = {}
+        self.stats = {"picks": 0, "rebalanced": 0}
+
+    def record_ping(self, assistant: int, ping: float):
+        self.pings[int(assistant)] = ping
+
+    def record_flood(self, assistant: int):
+        if assistant is None:
+            return
+        self.floods.setdefault(int(assistant), deque()).append(time.monotonic())
+
+    def mark_unhealthy(self, assistant: int, cooldown: float = 300):
+        if assistant is not None:
+            self.unhealthy[int(assistant)] = time.monotonic() + cooldown
+
+    def healthy(self, assistants: list) -> list:
+        now = time.monotonic()
+        return [num for num in assistants if self.unhealthy.get(num, 0) < now]
+
+    def recent_floods(self, assistant: int) -> int:
+        floods = self.floods.get(int(assistant))
+        if not floods:
+            return 0
+        cutoff = time.monotonic() - self.flood_window
+        while floods and floods[0] < cutoff:
+            floods.popleft()
+        return len(floods)
+
+    def load(self, assistants: list) -> dict:
+        load = {int(num): 0 for num in assistants}
+        for session in sessions:
+            if session.active and session.assistant in load:
+                load[session.assistant] += 1
+        now = time.monotonic()
+        for chat_id, (num, expires) in list(self.pending.items()):
+            session = sessions.get(chat_id)
+            if expires < now or (session and session.active):
+                del self.pending[chat_id]
+            elif num in load:
+                load[num] += 1
+        return load
+
+    def score(self, assistant: int, load: dict) -> float:
+        return (
+            load.get(assistant, 0)
+            + self.ping_weight * self.pings.get(assistant, 0)
+            + self.flood_weight * self.recent_floods(assistant)
+        )
+
+    def pick(self, assistants: list, chat_id: int = None) -> int:
+        load = self.load(self.healthy(assistants) or assistants)
+        # Ties go to the lowest number, so a single instance stays predictable.
+        assistant = min(load, key=lambda num: (self.score(num, load), num))
+        if chat_id is not None:
+            self.pending[chat_id] = (assistant, time.monotonic() + 30)
+        self.stats["picks"] += 1
+        return assistant
+
+    def should_move(self, assistant: int, assistants: list) -> bool:
+        if not self.margin or len(assistants) < 2:
+            return False
+        load = self.load(assistants)
+        if load.get(int(assistant), 0) - min(load.values()) < self.margin:
+            return False
+        self.stats["rebalanced"] += 1
+        return True
+
+    async def measure_pings(self, calls: dict, interval: float = 60):
+        while True:
+            for num, call in calls.items():
+                try:
+                    self.record_ping(num, await call.ping)
+                except Exception:
+                    pass
+            await asyncio.sleep(interval)
+
+
+balancer = AssistantBalancer(
+    config.ASSISTANT_PING_WEIGHT,
+    config.ASSISTANT_FLOOD_WEIGHT,
+    margin=config.ASSISTANT_REBALANCE_MARGIN,
+)
@@ -1,9 +1,12 @@
 import asyncio
 import os
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Union
 
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from pyrogram.types import InlineKeyboardMarkup
 
 from pytgcalls import PyTgCalls, StreamType
@@ -14,93 +17,88 @@ from pytgcalls.exceptions import (
 )
 from pytgcalls.types import Update
 from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
-from pytgcalls.types.input_stream.quality import HighQualityAudio, MediumQualityVideo
+from pytgcalls.types.input_stream.quality import HighQualityVideo
 from pytgcalls.types.stream import StreamAudioEnded
 
 import config
-from AnonXMusic import LOGGER, YouTube, app
+from AnonXMusic import LOGGER, YouTube, app, userbot
+from AnonXMusic.core.balancer import balancer
+from AnonXMusic.core.filecache import FileCache, queue_refs
+from AnonXMusic.core.quality import TIERS, quality
+from AnonXMusic.core.session import sessions
 from AnonXMusic.misc import db
 from AnonXMusic.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    get_assistant_number,
     get_lang,
     get_loop,
+    get_quality,
     group_assistant,
     is_autoend,
     music_on,
     remove_active_chat,
     remove_active_video_chat,
+    set_assistant_new,
     set_loop,
 )
 from AnonXMusic.utils.exceptions import AssistantErr
-from AnonXMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
+from AnonXMusic.utils.formatters import seconds_to_min, speed_converter
 from AnonXMusic.utils.inline.play import stream_markup
+from AnonXMusic.utils.decorators.play import get_invitelink, join_assistant
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.preroll import claim, kick
+from AnonXMusic.utils.stream.source import playback_speed, resolve_source
+from AnonXMusic.utils.stream.rendition import rendition
+from AnonXMusic.utils.stream.transcode import canonical
 from AnonXMusic.utils.thumbnails import get_thumb
 from strings import get_string
 
-autoend = {}
-counter = {}
+
+# Speed renders under playback/<speed>/, kept while a queue points at them.
+speed_cache = FileCache(
+    os.path.join(os.getcwd(), "playback"),
+    config.SPEED_CACHE_SIZE * 1024 * 1024,
+    in_use=lambda: queue_refs("speed_path"),
+)
 
 
 async def _clear_(chat_id):
-    db[chat_id] = []
-    await remove_active_video_chat(chat_id)
-    await remove_active_chat(chat_id)
+    sessions.close(chat_id)
+    quality.forget(chat_id)
+    kick()
 
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="AnonXAss1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="AnonXAss2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="AnonXAss3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="AnonXAss4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
-        )
-        self.userbot5 = Client(
-            name="AnonXAss5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-        )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
-        )
+        # Assistant number -> its own client and PyTgCalls instance.
+        self.userbots = {}
+        self.calls = {}
+        for num, string in config.STRING_SESSIONS.items():
+            self.userbots[num] = Client(
+                name=f"AnonXAss{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(string),
+            )
+            self.calls[num] = PyTgCalls(
+                self.userbots[num],
+                cache_duration=100,
+            )
+        self.failing = set()
+        self.failover_stats = {
+            "attempts": 0,
+            "recovered": 0,
+            "failed": 0,
+            # seconds from losing the call to playing again, latest last
+            "recovery": deque(maxlen=100),
+        }
+        # seconds of silence between the end of a track and the next one
+        # playing, latest last
+        self.gaps = deque(maxlen=100)
+
+    def get(self, assistant_num: int) -> PyTgCalls:
+        return self.calls.get(int(assistant_num))
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -110,6 +108,70 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         await assistant.resume_stream(chat_id)
 
+    async def _stream(
+        self, chat_id: int, link, video, ffmpeg_parameters: str = "", speed: float = 1.0
+    ):
+        tier = quality.tier(await get_quality(chat_id))
+        source = link
+        link = rendition(link, tier) if video else canonical(link)
+        audio_parameters, video_parameters = quality.parameters(chat_id, tier, link)
+        if video and link != source:
+            # Already at the size of the tier, pytgcalls keeps it as is.
+            video_parameters = HighQualityVideo()
+        if speed != 1.0:
+            # pytgcalls runs one ffmpeg for audio and one for video, each gets
+            # its own section. atempo goes after the input (-atmid), video
+            # timestamps are rescaled on input since pytgcalls appends its
+            # own -vf. -ss and -to stay on the timeline of the original.
+            ffmpeg_parameters = (
+                f"--audio {ffmpeg_parameters} -atmid -af atempo={speed} "
+                f"--video {ffmpeg_parameters} -itsscale {round(1 / speed, 4)}"
+            )
+        if video:
+            return AudioVideoPiped(
+                link,
+                audio_parameters=audio_parameters,
+                video_parameters=video_parameters,
+                additional_ffmpeg_parameters=ffmpeg_parameters,
+            )
+        return AudioPiped(
+            link,
+            audio_parameters=audio_parameters,
+            additional_ffmpeg_parameters=ffmpeg_parameters,
+        )
+
+    async def upgrade_stream(self, chat_id: int) -> bool:
+        # Restarts the current track where it is with the tier allowed now,
+        # undoing a downgrade once the host has room again.
+        session = sessions.get(chat_id)
+        current = quality.streams.get(chat_id)
+        if not session or not session.playing or not session.queue or not current:
+            return False
+        entry = session.queue[0]
+        if "live_" in entry["file"] or entry["seconds"] - entry["played"] < 60:
+            return False
+        tier = quality.tier(await get_quality(chat_id))
+        if TIERS.index(tier) >= TIERS.index(current[0]):
+            return False
+        video = str(entry["streamtype"]) == "video"
+        if "vid_" in entry["file"] and not entry.get("speed_path"):
+            # Played from a stream url, which is cached, never downloaded here:
+            # the monitor waits for every upgrade.
+            n, link = await YouTube.video(entry["vidid"], True)
+            if not n:
+                return False
+        else:
+            link = await resolve_source(entry, video)
+        if not link:
+            return False
+        speed = playback_speed(entry)
+        assistant = await group_assistant(self, chat_id)
+        stream = await self._stream(
+            chat_id, link, video, f"-ss {int(session.position * speed)}", speed=speed
+        )
+        await assistant.change_stream(chat_id, stream)
+        return True
+
     async def stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         try:
@@ -119,104 +181,158 @@ class Call(PyTgCalls):
             pass
 
     async def stop_stream_force(self, chat_id: int):
-        try:
-            if config.STRING1:
-                await self.one.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_group_call(chat_id)
-        except:
-            pass
+        for call in self.calls.values():
+            try:
+                await call.leave_group_call(chat_id)
+            except:
+                pass
         try:
             await _clear_(chat_id)
         except:
             pass
 
-    async def speedup_stream(self, chat_id: int, file_path, speed, playing):
-        assistant = await group_assistant(self, chat_id)
-        if str(speed) != str("1.0"):
-            base = os.path.basename(file_path)
-            chatdir = os.path.join(os.getcwd(), "playback", str(speed))
-            if not os.path.isdir(chatdir):
-                os.makedirs(chatdir)
-            out = os.path.join(chatdir, base)
-            if not os.path.isfile(out):
-                if str(speed) == str("0.5"):
-                    vs = 2.0
-                if str(speed) == str("0.75"):
-                    vs = 1.35
-                if str(speed) == str("1.5"):
-                    vs = 0.68
-                if str(speed) == str("2.0"):
-                    vs = 0.5
-                proc = await asyncio.create_subprocess_shell(
-                    cmd=(
-                        "ffmpeg "
-                        "-i "
-                        f"{file_path} "
-                        "-filter:v "
-                        f"setpts={vs}*PTS "
-                        "-filter:a "
-                        f"atempo={speed} "
-                        f"{out}"
-                    ),
-                    stdin=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await proc.communicate()
-            else:
-                pass
-        else:
-            out = file_path
-        dur = await asyncio.get_event_loop().run_in_executor(None, check_duration, out)
-        dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
-        duration = seconds_to_min(dur)
-        stream = (
-            AudioVideoPiped(
-                out,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
-            )
-            if playing[0]["streamtype"] == "video"
-            else AudioPiped(
+    async def _render_speed(self, file_path, speed) -> str:
+        # The whole file re-encoded at speed into playback/<speed>/, slow on
+        # long tracks. Chats asking for the same file and speed share it.
+        async def render(out):
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-y",
+                "-i",
+                file_path,
+                "-filter:v",
+                f"setpts={round(1 / float(speed), 4)}*PTS",
+                "-filter:a",
+                f"atempo={speed}",
                 out,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
+                stdin=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
             )
+            _, stderr = await proc.communicate()
+            if proc.returncode:
+                raise AssistantErr(stderr.decode(errors="ignore")[-300:])
+
+        out = os.path.join(
+            speed_cache.root, str(speed), os.path.basename(file_path)
         )
-        if str(db[chat_id][0]["file"]) == str(file_path):
-            await assistant.change_stream(chat_id, stream)
-        else:
+        return await speed_cache.get(out, render)
+
+    async def _prerender(self, chat_id: int, entry: dict, file_path, speed):
+        # Later seeks and restarts play the rendered file instead of
+        # filtering live, if the track still plays at that speed by then.
+        try:
+            out = await self._render_speed(file_path, speed)
+        except Exception as e:
+            return LOGGER(__name__).warning(f"Rendering {file_path} at {speed}x failed: {e}")
+        playing = db.get(chat_id)
+        if playing and playing[0] is entry and str(entry.get("speed")) == str(speed):
+            if os.path.isfile(out):
+                entry["speed_path"] = out
+
+    async def speedup_stream(self, chat_id: int, file_path, speed, playing):
+        assistant = await group_assistant(self, chat_id)
+        entry = playing[0]
+        video = entry["streamtype"] == "video"
+        # played counts seconds at the current speed, map it back onto the
+        # original track first.
+        position = int(entry["played"] * float(entry.get("speed") or 1.0))
+        seconds = int(entry.get("old_second") or entry["seconds"])
+        _, con_seconds = speed_converter(position, speed)
+        out = None
+        stream = await self._stream(
+            chat_id, file_path, video, f"-ss {position}", speed=float(speed)
+        )
+        if str(db[chat_id][0]["file"]) != str(file_path):
             raise AssistantErr("Umm")
+        try:
+            await assistant.change_stream(chat_id, stream)
+        except Exception as e:
+            if str(speed) == str("1.0"):
+                raise
+            LOGGER(__name__).warning(
+                f"Live speed change failed in {chat_id}, rendering the file: {e}"
+            )
+            out = await self._render_speed(file_path, speed)
+            stream = await self._stream(chat_id, out, video, f"-ss {con_seconds}")
+            if str(db[chat_id][0]["file"]) != str(file_path):
+                raise AssistantErr("Umm")
+            await assistant.change_stream(chat_id, stream)
         if str(db[chat_id][0]["file"]) == str(file_path):
             exis = (playing[0]).get("old_dur")
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
             db[chat_id][0]["played"] = con_seconds
-            db[chat_id][0]["dur"] = duration
-            db[chat_id][0]["seconds"] = dur
+            db[chat_id][0]["seconds"] = int(seconds / float(speed))
+            db[chat_id][0]["dur"] = (
+                db[chat_id][0]["old_dur"]
+                if str(speed) == str("1.0")
+                else seconds_to_min(db[chat_id][0]["seconds"])
+            )
             db[chat_id][0]["speed_path"] = out
             db[chat_id][0]["speed"] = speed
+            if out is None and config.SPEED_PRERENDER and str(speed) != str("1.0"):
+                asyncio.create_task(self._prerender(chat_id, entry, file_path, speed))
+
+    async def failover(self, chat_id: int, unhealthy: bool = False) -> bool:
+        # Moves a live session to another assistant and resumes the current
+        # track where it was, keeping the queue. unhealthy also keeps the old
+        # assistant out of new assignments for a while.
+        from AnonXMusic.core.userbot import assistants
+
+        session = sessions.get(chat_id)
+        if not session or not session.queue or chat_id in self.failing:
+            return False
+        self.failing.add(chat_id)
+        started = time.monotonic()
+        self.failover_stats["attempts"] += 1
+        old = session.assistant
+        entry = session.queue[0]
+        try:
+            if unhealthy:
+                balancer.mark_unhealthy(old)
+            candidates = [num for num in assistants if num != old]
+            if not candidates:
+                raise AssistantErr("no other assistant available")
+            new = balancer.pick(candidates, chat_id)
+            client = userbot.get(new)
+            chat = await app.get_chat(chat_id)
+            await join_assistant(
+                chat_id, client, await get_invitelink(chat_id, chat.username)
+            )
+            await set_assistant_new(chat_id, new)
+            video = str(entry["streamtype"]) == "video"
+            link = await resolve_source(entry, video)
+            if not link:
+                raise AssistantErr("current track is not available")
+            position = 0 if "live_" in entry["file"] else session.position
+            if old in self.calls:
+                try:
+                    await self.calls[old].leave_group_call(chat_id)
+                except:
+                    pass
+            await self.join_call(
+                chat_id,
+                entry["chat_id"],
+                link,
+                video=video,
+                position=position,
+                speed=playback_speed(entry),
+            )
+            entry["played"] = position
+        except Exception as e:
+            self.failover_stats["failed"] += 1
+            LOGGER(__name__).warning(f"Failover of {chat_id} from assistant {old} failed: {e}")
+            return False
+        finally:
+            self.failing.discard(chat_id)
+        elapsed = round(time.monotonic() - started, 2)
+        self.failover_stats["recovered"] += 1
+        self.failover_stats["recovery"].append(elapsed)
+        LOGGER(__name__).info(
+            f"Moved {chat_id} from assistant {old} to {new} in {elapsed}s."
+        )
+        return True
 
     async def force_stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -240,14 +356,7 @@ class Call(PyTgCalls):
         image: Union[bool, str] = None,
     ):
         assistant = await group_assistant(self, chat_id)
-        if video:
-            stream = AudioVideoPiped(
-                link,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-            )
-        else:
-            stream = AudioPiped(link, audio_parameters=HighQualityAudio())
+        stream = await self._stream(chat_id, link, video)
         await assistant.change_stream(
             chat_id,
             stream,
@@ -255,19 +364,19 @@ class Call(PyTgCalls):
 
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
-        stream = (
-            AudioVideoPiped(
-                file_path,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
-            if mode == "video"
-            else AudioPiped(
-                file_path,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
+        entry = db[chat_id][0]
+        speed = playback_speed(entry)
+        if speed != 1.0 and "live_" not in str(file_path):
+            # to_seek and duration are on the sped up timeline, the filters
+            # play the original file.
+            to_seek = seconds_to_min(int(config.time_to_seconds(to_seek) * speed))
+            duration = entry.get("old_dur") or duration
+        stream = await self._stream(
+            chat_id,
+            file_path,
+            mode == "video",
+            f"-ss {to_seek} -to {duration}",
+            speed=speed,
         )
         await assistant.change_stream(chat_id, stream)
 
@@ -288,26 +397,15 @@ class Call(PyTgCalls):
         link,
         video: Union[bool, str] = None,
         image: Union[bool, str] = None,
+        position: int = 0,
+        speed: float = 1.0,
     ):
         assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
-        if video:
-            stream = AudioVideoPiped(
-                link,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-            )
-        else:
-            stream = (
-                AudioVideoPiped(
-                    link,
-                    audio_parameters=HighQualityAudio(),
-                    video_parameters=MediumQualityVideo(),
-                )
-                if video
-                else AudioPiped(link, audio_parameters=HighQualityAudio())
-            )
+        # position counts seconds at speed, ffmpeg seeks in the original.
+        seek = f"-ss {int(position * speed)}" if position else ""
+        stream = await self._stream(chat_id, link, video, seek, speed=speed)
         try:
             await assistant.join_group_call(
                 chat_id,
@@ -324,13 +422,26 @@ class Call(PyTgCalls):
         await music_on(chat_id)
         if video:
             await add_active_video_chat(chat_id)
+        session = sessions.get(chat_id)
+        session.assistant = await get_assistant_number(chat_id)
         if await is_autoend():
-            counter[chat_id] = {}
             users = len(await assistant.get_participants(chat_id))
             if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(minutes=1)
+                session.autoend = datetime.now() + timedelta(minutes=1)
+
+    async def _change(self, client, chat_id: int, stream, ended: float = None):
+        try:
+            await client.change_stream(chat_id, stream)
+            if ended is not None:
+                self.gaps.append(time.monotonic() - ended)
+        except TelegramServerError:
+            # The new session already plays the head of the queue.
+            if not await self.failover(chat_id, unhealthy=True):
+                raise
 
     async def change_stream(self, client, chat_id):
+        ended = time.monotonic()
+        kick()
         check = db.get(chat_id)
         popped = None
         loop = await get_loop(chat_id)
@@ -366,33 +477,29 @@ class Call(PyTgCalls):
                 db[chat_id][0]["seconds"] = check[0]["old_second"]
                 db[chat_id][0]["speed_path"] = None
                 db[chat_id][0]["speed"] = 1.0
+                check[0].pop("prepared", None)
             video = True if str(streamtype) == "video" else False
+            # Fetched by the prefetch scheduler while the previous track played.
+            prepared = await claim(chat_id, check[0])
             if "live_" in queued:
-                n, link = await YouTube.video(videoid, True)
+                if prepared:
+                    n, link = 1, prepared
+                else:
+                    n, link = await YouTube.video(videoid, True)
                 if n == 0:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                if video:
-                    stream = AudioVideoPiped(
-                        link,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                else:
-                    stream = AudioPiped(
-                        link,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                stream = await self._stream(chat_id, link, video)
                 try:
-                    await client.change_stream(chat_id, stream)
+                    await self._change(client, chat_id, stream, ended)
                 except Exception:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid)
+                img = check[0].get("thumb") or await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
                 run = await app.send_photo(
                     chat_id=original_chat_id,
@@ -408,39 +515,34 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             elif "vid_" in queued:
-                mystic = await app.send_message(original_chat_id, _["call_7"])
-                try:
-                    file_path, direct = await YouTube.download(
-                        videoid,
-                        mystic,
-                        videoid=True,
-                        video=True if str(streamtype) == "video" else False,
-                    )
-                except:
-                    return await mystic.edit_text(
-                        _["call_6"], disable_web_page_preview=True
-                    )
-                if video:
-                    stream = AudioVideoPiped(
-                        file_path,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
+                mystic = None
+                if prepared:
+                    file_path = prepared
                 else:
-                    stream = AudioPiped(
-                        file_path,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                    mystic = await app.send_message(original_chat_id, _["call_7"])
+                    try:
+                        file_path, direct = await YouTube.download(
+                            videoid,
+                            mystic,
+                            videoid=True,
+                            video=True if str(streamtype) == "video" else False,
+                        )
+                    except:
+                        return await mystic.edit_text(
+                            _["call_6"], disable_web_page_preview=True
+                        )
+                stream = await self._stream(chat_id, file_path, video)
                 try:
-                    await client.change_stream(chat_id, stream)
+                    await self._change(client, chat_id, stream, ended)
                 except:
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid)
+                img = check[0].get("thumb") or await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                await mystic.delete()
+                if mystic:
+                    await mystic.delete()
                 run = await app.send_photo(
                     chat_id=original_chat_id,
                     photo=img,
@@ -455,17 +557,9 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "stream"
             elif "index_" in queued:
-                stream = (
-                    AudioVideoPiped(
-                        videoid,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(videoid, audio_parameters=HighQualityAudio())
-                )
+                stream = await self._stream(chat_id, videoid, video)
                 try:
-                    await client.change_stream(chat_id, stream)
+                    await self._change(client, chat_id, stream, ended)
                 except:
                     return await app.send_message(
                         original_chat_id,
@@ -481,19 +575,11 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             else:
-                if video:
-                    stream = AudioVideoPiped(
-                        queued,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                else:
-                    stream = AudioPiped(
-                        queued,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                if prepared:
+                    queued = prepared
+                stream = await self._stream(chat_id, queued, video)
                 try:
-                    await client.change_stream(chat_id, stream)
+                    await self._change(client, chat_id, stream, ended)
                 except:
                     return await app.send_message(
                         original_chat_id,
@@ -526,7 +612,7 @@ class Call(PyTgCalls):
                     db[chat_id][0]["mystic"] = run
                     db[chat_id][0]["markup"] = "tg"
                 else:
-                    img = await get_thumb(videoid)
+                    img = check[0].get("thumb") or await get_thumb(videoid)
                     button = stream_markup(_, chat_id)
                     run = await app.send_photo(
                         chat_id=original_chat_id,
@@ -543,60 +629,47 @@ class Call(PyTgCalls):
                     db[chat_id][0]["markup"] = "stream"
 
     async def ping(self):
-        pings = []
-        if config.STRING1:
-            pings.append(await self.one.ping)
-        if config.STRING2:
-            pings.append(await self.two.ping)
-        if config.STRING3:
-            pings.append(await self.three.ping)
-        if config.STRING4:
-            pings.append(await self.four.ping)
-        if config.STRING5:
-            pings.append(await self.five.ping)
+        pings = [await call.ping for call in self.calls.values()]
         return str(round(sum(pings) / len(pings), 3))
 
-    async def start(self):
-        LOGGER(__name__).info("Starting PyTgCalls Client...\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+    async def start_call(self, assistant_num: int):
+        for attempt in range(3):
+            try:
+                return await self.calls[assistant_num].start()
+            except FloodWait as e:
+                balancer.record_flood(assistant_num)
+                LOGGER(__name__).warning(
+                    f"FloodWait: Waiting {e.value + 1}s to start calls of assistant {assistant_num}"
+                )
+                await asyncio.sleep(e.value + 1)
+        raise AssistantErr(f"Could not start calls of assistant {assistant_num}")
 
     async def decorators(self):
-        @self.one.on_kicked()
-        @self.two.on_kicked()
-        @self.three.on_kicked()
-        @self.four.on_kicked()
-        @self.five.on_kicked()
-        @self.one.on_closed_voice_chat()
-        @self.two.on_closed_voice_chat()
-        @self.three.on_closed_voice_chat()
-        @self.four.on_closed_voice_chat()
-        @self.five.on_closed_voice_chat()
-        @self.one.on_left()
-        @self.two.on_left()
-        @self.three.on_left()
-        @self.four.on_left()
-        @self.five.on_left()
         async def stream_services_handler(_, chat_id: int):
             await self.stop_stream(chat_id)
 
-        @self.one.on_stream_end()
-        @self.two.on_stream_end()
-        @self.three.on_stream_end()
-        @self.four.on_stream_end()
-        @self.five.on_stream_end()
+        async def assistant_lost_handler(client, chat_id: int):
+            # Only the assistant serving the chat matters, an idle one left
+            # behind by a failover or rebalance can be kicked freely. A
+            # failover already moving the chat handles it.
+            session = sessions.get(chat_id)
+            if not session or client is not self.calls.get(session.assistant):
+                return
+            if chat_id in self.failing:
+                return
+            if not await self.failover(chat_id):
+                await self.stop_stream(chat_id)
+
         async def stream_end_handler1(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
             await self.change_stream(client, update.chat_id)
 
+        for call in self.calls.values():
+            call.on_kicked()(assistant_lost_handler)
+            call.on_closed_voice_chat()(stream_services_handler)
+            call.on_left()(assistant_lost_handler)
+            call.on_stream_end()(stream_end_handler1)
+
 
 Anony = Call()
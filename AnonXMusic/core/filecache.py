@@ -0,0 +1,135 @@
+import asyncio
+import os
+import shutil
+from collections import Counter, OrderedDict
+
+from ..logging import LOGGER
+from .session import sessions
+
+log = LOGGER(__name__)
+
+# Prefix of files still being written, never served and removed on load.
+PARTIAL = "partial-"
+
+
+def queue_refs(field: str) -> Counter:
+    # How many queued entries of all chats point at each path in field.
+    refs = Counter()
+    for session in sessions:
+        for entry in session.queue:
+            path = entry.get(field)
+            if path:
+                refs[path] += 1
+    return refs
+
+
+class FileCache:
+    def __init__(self, root: str, max_bytes: int, in_use=None, min_free: int = 0):
+        # Files rendered under root, at most max_bytes of them, and fewer
+        # when the disk has less than min_free bytes left. in_use() returns
+        # reference counts per path, referenced files are never evicted even
+        # when that keeps the cache over its size.
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_free = min_free
+        self.in_use = in_use or Counter
+        # path -> size, least recently used first
+        self.files = OrderedDict()
+        # path -> future of the render writing it
+        self.rendering = {}
+        self.stats = {"hits": 0, "renders": 0, "joined": 0, "evicted": 0, "failed": 0}
+        self._loaded = False
+
+    def _load(self):
+        found = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    if name.startswith(PARTIAL):
+                        os.remove(path)
+                        continue
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self.files[path] = size
+        self._loaded = True
+
+    @property
+    def size(self) -> int:
+        return sum(self.files.values())
+
+    def lookup(self, path: str):
+        # path when it is cached, None otherwise.
+        if not self._loaded:
+            self._load()
+        if path in self.files:
+            if os.path.isfile(path):
+                self.files.move_to_end(path)
+                self.stats["hits"] += 1
+                return path
+            del self.files[path]
+        return None
+
+    async def get(self, path: str, render) -> str:
+        # path, rendered by render(tmp) first when it is not cached. Callers
+        # asking for a path that is being rendered wait for that render.
+        if self.lookup(path):
+            return path
+        pending = self.rendering.get(path)
+        if pending is None:
+            pending = self.rendering[path] = asyncio.ensure_future(
+                self._render(path, render)
+            )
+        else:
+            self.stats["joined"] += 1
+        return await asyncio.shield(pending)
+
+    async def _render(self, path: str, render) -> str:
+        folder, name = os.path.split(path)
+        os.makedirs(folder or ".", exist_ok=True)
+        tmp = os.path.join(folder, f"{PARTIAL}{os.getpid()}-{name}")
+        try:
+            await render(tmp)
+            if not os.path.isfile(tmp) or not os.path.getsize(tmp):
+                raise RuntimeError(f"nothing was rendered for {path}")
+            os.replace(tmp, path)
+        except BaseException:
+            self.stats["failed"] += 1
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        finally:
+            self.rendering.pop(path, None)
+        self.files[path] = os.path.getsize(path)
+        self.stats["renders"] += 1
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: str = None) -> int:
+        # keep is the file just rendered, its caller is about to use it.
+        used = self.in_use()
+        total = self.size
+        free = shutil.disk_usage(self.root).free if self.min_free else 0
+        evicted = 0
+        for path in list(self.files):
+            if total <= self.max_bytes and free >= self.min_free:
+                break
+            if used.get(path) or path == keep:
+                continue
+            size = self.files.pop(path)
+            total -= size
+            free += size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            evicted += 1
+        if evicted:
+            self.stats["evicted"] += evicted
+            log.info(f"Evicted {evicted} files from {self.root}, {total >> 20} MB left.")
+        return evicted
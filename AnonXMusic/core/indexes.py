@@ -0,0 +1,81 @@
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from ..logging import LOGGER
+from .mongo import _mongo_async_
+
+log = LOGGER(__name__)
+
+
+def _index(*keys, unique: bool = False) -> IndexModel:
+    return IndexModel([(key, ASCENDING) for key in keys], unique=unique)
+
+
+# Required indexes per database and collection. Lookups by _id (chat_settings,
+# chats, tgusersdb, migrations) are covered by the default index.
+INDEXES = {
+    "Anon": {
+        "authlist": [_index("chat_id", "auth_user_id", unique=True)],
+        "autoend": [_index("chat_id")],
+        "blacklistChat": [_index("chat_id", unique=True)],
+        "blockedusers": [_index("user_id", unique=True)],
+        "gban": [_index("user_id", unique=True)],
+        "onoffper": [_index("on_off")],
+        "sudoers": [_index("sudo", unique=True)],
+    },
+    "AnonxMusic": {
+        "afk": [_index("user_id", unique=True)],
+        "chats": [_index("chat_id")],
+        "couple": [_index("chat_id")],
+        "users": [_index("user_id")],
+    },
+    "MAIN": {
+        "welcome": [_index("group_id")],
+    },
+}
+
+
+async def ensure_indexes() -> dict:
+    created = {}
+    for dbname, collections in INDEXES.items():
+        database = _mongo_async_[dbname]
+        for name, indexes in collections.items():
+            try:
+                created[f"{dbname}.{name}"] = await database[name].create_indexes(
+                    indexes
+                )
+            except OperationFailure as e:
+                # Usually duplicate values blocking a unique index, the bot
+                # keeps working without it and /dbindexes reports it missing.
+                log.warning(f"Could not create indexes on {dbname}.{name}: {e}")
+    return created
+
+
+async def audit_indexes() -> list:
+    report = []
+    for dbname, collections in INDEXES.items():
+        database = _mongo_async_[dbname]
+        existing_names = set(await database.list_collection_names())
+        for name, indexes in collections.items():
+            entry = {
+                "collection": f"{dbname}.{name}",
+                "count": 0,
+                "size": 0,
+                "missing": [index.document["name"] for index in indexes],
+                "unused": [],
+            }
+            report.append(entry)
+            if name not in existing_names:
+                continue
+            stats = await database.command("collStats", name)
+            entry["count"] = stats.get("count", 0)
+            entry["size"] = stats.get("size", 0) + stats.get("totalIndexSize", 0)
+            existing = await database[name].index_information()
+            entry["missing"] = [i for i in entry["missing"] if i not in existing]
+            try:
+                async for usage in database[name].aggregate([{"$indexStats": {}}]):
+                    if usage["name"] != "_id_" and not usage["accesses"]["ops"]:
+                        entry["unused"].append(usage["name"])
+            except OperationFailure:
+                pass
+    return report
@@ -1,12 +1,22 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 
+import config
 from config import MONGO_DB_URI
 
 from ..logging import LOGGER
 
 LOGGER(__name__).info("Connecting to your Mongo Database...")
 try:
-    _mongo_async_ = AsyncIOMotorClient(MONGO_DB_URI)
+    # The only client in the bot, every database below shares its pool.
+    _mongo_async_ = AsyncIOMotorClient(
+        MONGO_DB_URI,
+        maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=config.MONGO_MIN_POOL_SIZE,
+        connectTimeoutMS=int(config.MONGO_TIMEOUT * 1000),
+        serverSelectionTimeoutMS=int(config.MONGO_TIMEOUT * 1000),
+        waitQueueTimeoutMS=int(config.MONGO_TIMEOUT * 1000),
+        compressors=config.MONGO_COMPRESSORS or None,
+    )
     mongodb = _mongo_async_.Anon
     LOGGER(__name__).info("Connected to your Mongo Database.")
 except:
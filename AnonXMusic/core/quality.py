@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import psutil
+from pytgcalls.types.input_stream.quality import (
+    HighQualityAudio,
+    LowQualityAudio,
+    LowQualityVideo,
+    MediumQualityAudio,
+    MediumQualityVideo,
+)
+
+import config
+
+from ..logging import LOGGER
+from .session import sessions
+
+log = LOGGER(__name__)
+
+# Best first. "high" is what every stream used before tiers existed.
+TIERS = ("high", "medium", "low")
+PARAMETERS = {
+    "high": (HighQualityAudio, MediumQualityVideo),
+    "medium": (MediumQualityAudio, LowQualityVideo),
+    "low": (LowQualityAudio, LowQualityVideo),
+}
+
+
+class QualityPolicy:
+    def __init__(
+        self,
+        cpu_medium: float = 70,
+        cpu_low: float = 90,
+        streams_medium: int = 0,
+        streams_low: int = 0,
+        upgrade_after: float = 120,
+    ):
+        # New streams drop to medium once host CPU reaches cpu_medium percent
+        # or streams_medium calls are active, to low at cpu_low / streams_low.
+        # A stream limit of 0 is off.
+        self.cpu_medium = cpu_medium
+        self.cpu_low = cpu_low
+        self.streams_medium = streams_medium
+        self.streams_low = streams_low
+        # The host goes back up one tier at a time, after staying below the
+        # thresholds for upgrade_after seconds.
+        self.upgrade_after = upgrade_after
+        self.cpu = 0.0
+        self.level = 0
+        self.calm_since = None
+        # chat id -> (tier, source) of the stream it plays
+        self.streams = {}
+        # chat id -> CPU percent of the ffmpeg processes of its stream
+        self.usage = {}
+        self.stats = {"high": 0, "medium": 0, "low": 0, "upgraded": 0}
+        self._procs = {}
+
+    def _pressure(self) -> int:
+        active = len(sessions.active)
+        level = 0
+        if self.cpu >= self.cpu_medium or (
+            self.streams_medium and active >= self.streams_medium
+        ):
+            level = 1
+        if self.cpu >= self.cpu_low or (self.streams_low and active >= self.streams_low):
+            level = 2
+        return level
+
+    def update(self, cpu: float):
+        self.cpu = cpu
+        level = self._pressure()
+        if level >= self.level:
+            if level > self.level:
+                log.info(f"Host CPU at {cpu}%, new streams use {TIERS[level]} quality.")
+            self.level = level
+            self.calm_since = None
+            return
+        now = time.monotonic()
+        if self.calm_since is None:
+            self.calm_since = now
+        elif now - self.calm_since >= self.upgrade_after:
+            self.level -= 1
+            self.calm_since = now
+            log.info(f"Host CPU at {cpu}%, new streams use {TIERS[self.level]} quality.")
+
+    def tier(self, preference: str = "auto") -> str:
+        # A chat can ask for less than the host allows, never for more.
+        level = max(self.level, self._pressure())
+        if preference in TIERS:
+            level = max(level, TIERS.index(preference))
+        return TIERS[level]
+
+    def parameters(self, chat_id: int, tier: str, source: str):
+        # Counted once per stream and tier, seeks, speed changes and
+        # failovers restart the same stream.
+        current = self.streams.get(chat_id)
+        if current is None or current[0] != tier:
+            self.stats[tier] += 1
+        self.streams[chat_id] = (tier, str(source))
+        audio, video = PARAMETERS[tier]
+        return audio(), video()
+
+    def forget(self, chat_id: int):
+        self.streams.pop(chat_id, None)
+        self.usage.pop(chat_id, None)
+
+    def upgradable(self) -> list:
+        # Chats playing below what the host allows now, lowest tier first.
+        chats = [
+            (TIERS.index(tier), chat_id)
+            for chat_id, (tier, _) in self.streams.items()
+            if TIERS.index(tier) > self.level
+        ]
+        return [chat_id for _, chat_id in sorted(chats, reverse=True)]
+
+    def tier_usage(self) -> dict:
+        # Average CPU percent of one stream per tier, from the last sample.
+        totals = {}
+        for chat_id, percent in self.usage.items():
+            stream = self.streams.get(chat_id)
+            if stream:
+                totals.setdefault(stream[0], []).append(percent)
+        return {
+            tier: round(sum(values) / len(values), 1)
+            for tier, values in totals.items()
+        }
+
+    def _sample_streams(self, streams: dict) -> dict:
+        # ffmpeg is started by the pytgcalls node process, its command line
+        # carries the source, which is matched back to the chat playing it.
+        # Runs in a thread, streams is a copy taken on the loop.
+        usage = {}
+        seen = set()
+        try:
+            children = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            return usage
+        for child in children:
+            try:
+                if "ffmpeg" not in child.name():
+                    continue
+                proc = self._procs.setdefault(child.pid, child)
+                percent = proc.cpu_percent(None)
+                cmdline = " ".join(proc.cmdline())
+            except psutil.Error:
+                continue
+            seen.add(child.pid)
+            for chat_id, (_, source) in streams.items():
+                if source in cmdline:
+                    usage[chat_id] = usage.get(chat_id, 0) + percent
+                    break
+        for pid in list(self._procs):
+            if pid not in seen:
+                del self._procs[pid]
+        return usage
+
+    async def monitor(self, upgrade, interval: float = 5):
+        # upgrade(chat_id) restarts a stream with the tier allowed now and
+        # returns whether it did, one per pass so upgrades do not land at
+        # once and push the host back over.
+        loop = asyncio.get_running_loop()
+        psutil.cpu_percent(None)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.update(psutil.cpu_percent(None))
+                self.usage = await loop.run_in_executor(
+                    None, self._sample_streams, dict(self.streams)
+                )
+                for chat_id in self.upgradable():
+                    if await upgrade(chat_id):
+                        self.stats["upgraded"] += 1
+                        break
+            except Exception as e:
+                log.warning(f"Quality monitor failed: {e}")
+
+
+quality = QualityPolicy(
+    config.QUALITY_CPU_MEDIUM,
+    config.QUALITY_CPU_LOW,
+    config.QUALITY_STREAMS_MEDIUM,
+    config.QUALITY_STREAMS_LOW,
+)
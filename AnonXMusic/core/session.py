@@ -0,0 +1,117 @@
+from collections.abc import MutableMapping
+
+
+class PlaybackSession:
+    __slots__ = (
+        "chat_id",
+        "queue",
+        "active",
+        "video",
+        "playing",
+        "loop",
+        "assistant",
+        "autoend",
+    )
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.queue = []
+        self.active = False
+        self.video = False
+        self.playing = False
+        self.loop = 0
+        self.assistant = None
+        self.autoend = None
+
+    @property
+    def position(self) -> int:
+        if not self.queue:
+            return 0
+        return self.queue[0]["played"]
+
+
+class SessionRegistry:
+    def __init__(self):
+        self.sessions = {}
+        # Dicts used as insertion ordered sets of chat ids.
+        self.active = {}
+        self.video = {}
+
+    def __iter__(self):
+        return iter(list(self.sessions.values()))
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, chat_id: int) -> PlaybackSession:
+        return self.sessions.get(chat_id)
+
+    def open(self, chat_id: int) -> PlaybackSession:
+        session = self.sessions.get(chat_id)
+        if session is None:
+            session = self.sessions[chat_id] = PlaybackSession(chat_id)
+        return session
+
+    def close(self, chat_id: int) -> PlaybackSession:
+        self.active.pop(chat_id, None)
+        self.video.pop(chat_id, None)
+        return self.sessions.pop(chat_id, None)
+
+    def activate(self, chat_id: int, video: bool = False):
+        session = self.open(chat_id)
+        session.active = True
+        self.active[chat_id] = None
+        if video:
+            self.activate_video(chat_id)
+
+    def activate_video(self, chat_id: int):
+        session = self.open(chat_id)
+        session.video = True
+        self.video[chat_id] = None
+
+    def deactivate(self, chat_id: int):
+        self.active.pop(chat_id, None)
+        session = self.sessions.get(chat_id)
+        if session is None:
+            return
+        session.active = False
+        if not session.queue and not session.video:
+            self.close(chat_id)
+
+    def deactivate_video(self, chat_id: int):
+        self.video.pop(chat_id, None)
+        session = self.sessions.get(chat_id)
+        if session is None:
+            return
+        session.video = False
+        if not session.queue and not session.active:
+            self.close(chat_id)
+
+
+class QueueView(MutableMapping):
+    # Dict-like view of every session's queue, kept for the code that still
+    # reads and writes misc.db directly.
+    def __init__(self, registry: SessionRegistry):
+        self.registry = registry
+
+    def __getitem__(self, chat_id):
+        session = self.registry.get(chat_id)
+        if session is None:
+            raise KeyError(chat_id)
+        return session.queue
+
+    def __setitem__(self, chat_id, queue):
+        self.registry.open(chat_id).queue = queue
+
+    def __delitem__(self, chat_id):
+        if self.registry.close(chat_id) is None:
+            raise KeyError(chat_id)
+
+    def __iter__(self):
+        return iter(list(self.registry.sessions))
+
+    def __len__(self):
+        return len(self.registry)
+
+
+sessions = SessionRegistry()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+
+from pymongo import DeleteOne, ReplaceOne
+
+import config
+
+from ..logging import LOGGER
+from .mongo import mongodb
+from .session import sessions
+
+log = LOGGER(__name__)
+
+# Queue entry fields worth keeping across a restart, the rest (mystic
+# messages, markups) only make sense for the running process.
+FIELDS = (
+    "title",
+    "dur",
+    "streamtype",
+    "by",
+    "user_id",
+    "chat_id",
+    "file",
+    "vidid",
+    "seconds",
+    "played",
+    "speed",
+    "speed_path",
+    "old_dur",
+    "old_second",
+)
+
+
+class QueueSnapshots:
+    def __init__(self, target: str = "disk", interval: float = 10, path: str = None):
+        self.target = target
+        self.interval = interval
+        self.path = path
+        self.collection = mongodb.queues
+        # chat id -> serialized state as last written, so unchanged chats
+        # are skipped on the next pass.
+        self.saved = {}
+        self.stats = {"writes": 0, "deletes": 0, "skipped": 0}
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @staticmethod
+    def _state(session) -> dict:
+        return {
+            "chat_id": session.chat_id,
+            "video": session.video,
+            "loop": session.loop,
+            "queue": [
+                {key: entry[key] for key in FIELDS if key in entry}
+                for entry in session.queue
+            ],
+        }
+
+    def collect(self) -> dict:
+        states = {}
+        for session in sessions:
+            if session.queue:
+                state = self._state(session)
+                states[session.chat_id] = json.dumps(state, default=str)
+        return states
+
+    def _file(self, chat_id: int) -> str:
+        return os.path.join(self.path, f"{chat_id}.json")
+
+    def _write_disk(self, changed: dict, removed: list):
+        os.makedirs(self.path, exist_ok=True)
+        for chat_id, state in changed.items():
+            tmp = self._file(chat_id) + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(state)
+            os.replace(tmp, self._file(chat_id))
+        for chat_id in removed:
+            try:
+                os.remove(self._file(chat_id))
+            except FileNotFoundError:
+                pass
+
+    async def _write_mongo(self, changed: dict, removed: list):
+        requests = [
+            ReplaceOne({"_id": chat_id}, json.loads(state), upsert=True)
+            for chat_id, state in changed.items()
+        ]
+        requests.extend(DeleteOne({"_id": chat_id}) for chat_id in removed)
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+
+    async def save(self) -> int:
+        if self.target not in ("disk", "mongo"):
+            return 0
+        async with self._lock:
+            states = self.collect()
+            changed = {
+                chat_id: state
+                for chat_id, state in states.items()
+                if self.saved.get(chat_id) != state
+            }
+            removed = [chat_id for chat_id in self.saved if chat_id not in states]
+            self.stats["skipped"] += len(states) - len(changed)
+            if not changed and not removed:
+                return 0
+            if self.target == "disk":
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._write_disk, changed, removed
+                )
+            else:
+                await self._write_mongo(changed, removed)
+            self.saved = states
+            self.stats["writes"] += len(changed)
+            self.stats["deletes"] += len(removed)
+            return len(changed) + len(removed)
+
+    def _read_disk(self) -> list:
+        states = []
+        if not os.path.isdir(self.path):
+            return states
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name)) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError) as e:
+                log.warning(f"Skipping unreadable queue snapshot {name}: {e}")
+        return states
+
+    async def load(self) -> list:
+        if self.target == "disk":
+            states = await asyncio.get_running_loop().run_in_executor(
+                None, self._read_disk
+            )
+        elif self.target == "mongo":
+            states = await self.collection.find({}, {"_id": 0}).to_list(length=None)
+        else:
+            return []
+        # Known to the next save, which drops the chats that were not resumed.
+        self.saved = {state["chat_id"]: None for state in states}
+        # Longest queues first, those chats lose the most if they are late.
+        states.sort(key=lambda state: len(state.get("queue") or []), reverse=True)
+        return states
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                log.warning(f"Queue snapshot failed: {e}")
+
+    def start(self):
+        if self.target not in ("disk", "mongo") or self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+        log.info(f"Saving queue snapshots to {self.target} every {self.interval}s.")
+
+    async def stop(self):
+        # Takes a last snapshot and freezes it, used before restarts so the
+        # teardown that follows is not recorded.
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.save()
+        except Exception as e:
+            log.warning(f"Final queue snapshot failed: {e}")
+        self.target = None
+
+
+snapshots = QueueSnapshots(
+    config.QUEUE_SNAPSHOT, config.QUEUE_SNAPSHOT_INTERVAL, config.QUEUE_SNAPSHOT_PATH
+)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+# Document stores behind the settings helpers in utils/database.py. A table
+# maps a key (usually a chat id) to a flat dict of fields, set() merges the
+# given fields into the stored document.
+
+
+class MongoStorage:
+    name = "mongo"
+
+    def __init__(self, database, writer=None):
+        self.database = database
+        # Optional WriteBehind buffer, reads overlay whatever it still holds.
+        self.writer = writer
+
+    def _pending(self, collection, key):
+        if self.writer is None:
+            return None
+        return self.writer.get_pending(collection, {"_id": key})
+
+    async def get(self, table: str, key):
+        collection = self.database[table]
+        pending = self._pending(collection, key)
+        if pending is None:
+            return await collection.find_one({"_id": key})
+        op, fields = pending
+        if op == "delete":
+            return None
+        if op == "replace":
+            return {"_id": key, **fields}
+        doc = await collection.find_one({"_id": key}) or {"_id": key}
+        doc.update(fields)
+        return doc
+
+    async def get_many(self, table: str, keys: list) -> dict:
+        collection = self.database[table]
+        docs = {}
+        async for doc in collection.find({"_id": {"$in": list(keys)}}):
+            docs[doc["_id"]] = doc
+        for key in keys:
+            pending = self._pending(collection, key)
+            if pending is None:
+                continue
+            op, fields = pending
+            if op == "delete":
+                docs.pop(key, None)
+            elif op == "replace":
+                docs[key] = {"_id": key, **fields}
+            else:
+                docs[key] = dict(docs.get(key) or {"_id": key}, **fields)
+        return docs
+
+    async def set(self, table: str, key, fields: dict):
+        collection = self.database[table]
+        if self.writer is not None:
+            return await self.writer.set(collection, {"_id": key}, fields)
+        await collection.update_one({"_id": key}, {"$set": fields}, upsert=True)
+
+    async def delete(self, table: str, key):
+        collection = self.database[table]
+        if self.writer is not None:
+            return await self.writer.delete(collection, {"_id": key})
+        await collection.delete_one({"_id": key})
+
+    async def close(self):
+        pass
+
+
+class SQLiteStorage:
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        # sqlite3 connections are not safe to share between threads, so one
+        # worker thread owns the connection and every query runs on it.
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite")
+        self._conn = None
+        self._sql = {}
+
+    def _connect(self):
+        # The module compiles each distinct SQL string once and keeps it in
+        # its statement cache, the fixed per-table strings below are reused.
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _statements(self, table: str) -> dict:
+        sql = self._sql.get(table)
+        if sql is not None:
+            return sql
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        if self._conn is None:
+            self._conn = self._connect()
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key PRIMARY KEY, doc TEXT NOT NULL) WITHOUT ROWID"
+        )
+        sql = self._sql[table] = {
+            "get": f"SELECT doc FROM {table} WHERE key = ?",
+            "put": f"INSERT OR REPLACE INTO {table} (key, doc) VALUES (?, ?)",
+            "delete": f"DELETE FROM {table} WHERE key = ?",
+        }
+        return sql
+
+    def _get(self, table: str, key):
+        sql = self._statements(table)
+        row = self._conn.execute(sql["get"], (key,)).fetchone()
+        if row is None:
+            return None
+        doc = json.loads(row[0])
+        doc["_id"] = key
+        return doc
+
+    def _get_many(self, table: str, keys: list) -> dict:
+        docs = {}
+        for key in keys:
+            doc = self._get(table, key)
+            if doc is not None:
+                docs[key] = doc
+        return docs
+
+    def _set(self, table: str, key, fields: dict):
+        doc = self._get(table, key) or {}
+        doc.pop("_id", None)
+        doc.update(fields)
+        self._conn.execute(self._sql[table]["put"], (key, json.dumps(doc)))
+
+    def _delete(self, table: str, key):
+        sql = self._statements(table)
+        self._conn.execute(sql["delete"], (key,))
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def get(self, table: str, key):
+        return await self._run(self._get, table, key)
+
+    async def get_many(self, table: str, keys: list) -> dict:
+        return await self._run(self._get_many, table, list(keys))
+
+    async def set(self, table: str, key, fields: dict):
+        await self._run(self._set, table, key, fields)
+
+    async def delete(self, table: str, key):
+        await self._run(self._delete, table, key)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
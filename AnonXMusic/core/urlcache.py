@@ -0,0 +1,119 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+
+import config
+
+from ..logging import LOGGER
+
+log = LOGGER(__name__)
+
+# googlevideo urls carry the unix time they stop working, as a query
+# parameter for files and as a path segment for live manifests.
+EXPIRE = re.compile(r"[?&/]expire[=/](\d+)")
+# Urls without one are trusted for an hour, as long as prefetched urls were.
+FALLBACK_LIFETIME = 3600
+
+
+def lifetime(url) -> float:
+    # Seconds until url expires, None when it does not say.
+    match = EXPIRE.search(str(url))
+    if not match:
+        return None
+    return int(match.group(1)) - time.time()
+
+
+class StreamURLs:
+    def __init__(self, maxsize: int = 1000, margin: float = 1800):
+        # Resolved stream urls per (video id, format), served until they have
+        # less than margin seconds left, enough to play a track and seek in it.
+        self.maxsize = maxsize
+        self.margin = margin
+        # key -> (url, unix time it expires, resolve), least recently used first
+        self.urls = OrderedDict()
+        # key -> future of the resolve in flight
+        self.pending = {}
+        # key -> monotonic time a failed key may be refreshed again
+        self.backoff = {}
+        self.stats = {"hits": 0, "resolved": 0, "joined": 0, "refreshed": 0, "failed": 0}
+
+    def _left(self, key) -> float:
+        return self.urls[key][1] - time.time()
+
+    async def get(self, key, resolve):
+        # (1, url) for key, from the cache or from resolve(), which returns
+        # (1, url) or (0, error). Callers asking for a key that is being
+        # resolved wait for that resolve.
+        if key in self.urls and self._left(key) > self.margin:
+            self.urls.move_to_end(key)
+            self.stats["hits"] += 1
+            return 1, self.urls[key][0]
+        pending = self.pending.get(key)
+        if pending is None:
+            pending = self._start(key, resolve)
+        else:
+            self.stats["joined"] += 1
+        return await asyncio.shield(pending)
+
+    def _start(self, key, resolve):
+        pending = self.pending[key] = asyncio.ensure_future(self._resolve(key, resolve))
+        return pending
+
+    async def _resolve(self, key, resolve):
+        try:
+            n, url = await resolve()
+        except Exception as e:
+            n, url = 0, str(e)
+        finally:
+            self.pending.pop(key, None)
+        if not n:
+            self.stats["failed"] += 1
+            self.backoff[key] = time.monotonic() + 60
+            return n, url
+        self.backoff.pop(key, None)
+        left = lifetime(url)
+        expires = time.time() + (FALLBACK_LIFETIME if left is None else left)
+        self.urls[key] = (url, expires, resolve)
+        self.urls.move_to_end(key)
+        self.stats["resolved"] += 1
+        self._prune()
+        return n, url
+
+    def _prune(self):
+        now = time.time()
+        for key, (_, expires, _) in list(self.urls.items()):
+            if expires <= now:
+                del self.urls[key]
+        while len(self.urls) > self.maxsize:
+            self.urls.popitem(last=False)
+        for key in list(self.backoff):
+            if key not in self.urls:
+                del self.backoff[key]
+
+    def refresh(self, ids, limit: int = 2) -> int:
+        # Resolves again, in the background, the cached urls of the video ids
+        # in ids that get within twice the margin of expiring, so the tracks
+        # about to play, loop or seek never wait for yt-dlp.
+        started = 0
+        for key in list(self.urls):
+            if len(self.pending) >= limit:
+                break
+            if key[0] not in ids or key in self.pending:
+                continue
+            if self.backoff.get(key, 0) > time.monotonic():
+                continue
+            if self._left(key) > 2 * self.margin:
+                continue
+            self._start(key, self.urls[key][2]).add_done_callback(self._refreshed)
+            started += 1
+        return started
+
+    def _refreshed(self, future):
+        if not future.cancelled() and future.result()[0]:
+            self.stats["refreshed"] += 1
+        elif not future.cancelled():
+            log.warning(f"Refreshing a stream url failed: {future.result()[1][-200:]}")
+
+
+stream_urls = StreamURLs(config.URL_CACHE_SIZE, config.URL_REFRESH_MARGIN)
@@ -2,7 +2,9 @@ from pyrogram import Client
 from pyrogram.errors.exceptions.flood_420 import FloodWait
 import config
 from ..logging import LOGGER
+from .balancer import balancer
 import asyncio
+import time
 
 assistants = []
 assistantids = []
@@ -12,30 +14,21 @@ log = LOGGER(__name__)
 
 class Userbot(Client):
     def __init__(self):
-        self.clients = []
+        # Assistant number -> client, one per configured session string.
+        self.clients = {}
+        self.started = None
+        self.timings = {}
+        for idx, string in config.STRING_SESSIONS.items():
+            self.clients[idx] = Client(
+                name=f"AnonXAss{idx}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(string),
+                no_updates=True,
+            )
 
-        # Define session strings
-        session_strings = [
-            config.STRING1,
-            config.STRING2,
-            config.STRING3,
-            config.STRING4,
-            config.STRING5,
-        ]
-
-        # Create clients and add legacy attributes
-        for idx, string in enumerate(session_strings, start=1):
-            if string:
-                client = Client(
-                    name=f"AnonXAss{idx}",
-                    api_id=config.API_ID,
-                    api_hash=config.API_HASH,
-                    session_string=str(string),
-                    no_updates=True,
-                )
-                self.clients.append((client, string, idx))
-                # Add backward-compatible attribute: one, two, etc.
-                setattr(self, f"{['one','two','three','four','five'][idx-1]}", client)
+    def get(self, assistant_num: int):
+        return self.clients.get(int(assistant_num))
 
     async def start_assistant(self, client, assistant_num):
         async def try_start(client, max_retries=3):
@@ -44,6 +37,7 @@ class Userbot(Client):
                     await client.start()
                     return True
                 except FloodWait as e:
+                    balancer.record_flood(assistant_num)
                     wait_time = e.value + 1
                     log.warning(f"FloodWait: Waiting {wait_time}s for assistant {assistant_num}")
                     await asyncio.sleep(wait_time)
@@ -63,45 +57,79 @@ class Userbot(Client):
         except Exception:
             pass
 
-        assistants.append(assistant_num)
-
         # Try sending log
         try:
             await client.send_message(config.LOGGER_ID, f"Assistant {assistant_num} Started - Joined @BillaSpace")
         except Exception:
             log.error(f"Assistant {assistant_num} couldn't access LOGGER_ID. Add it and promote to admin.")
-            return False
 
         # Get assistant info
-        try:
-            me = await client.get_me()
-            client.id = me.id
-            client.name = me.mention
-            client.username = me.username
-            assistantids.append(me.id)
-            log.info(f"Assistant {assistant_num} started as {client.name}")
-            return True
-        except FloodWait as e:
-            wait_time = e.value + 1
-            log.warning(f"FloodWait during get_me on assistant {assistant_num}. Waiting {wait_time}s.")
-            await asyncio.sleep(wait_time)
-            return False
-        except Exception as e:
-            log.error(f"Failed to fetch info for assistant {assistant_num}: {e}")
-            return False
+        for attempt in range(3):
+            try:
+                me = await client.get_me()
+                client.id = me.id
+                client.name = me.mention
+                client.username = me.username
+                assistantids.append(me.id)
+                log.info(f"Assistant {assistant_num} started as {client.name}")
+                return True
+            except FloodWait as e:
+                balancer.record_flood(assistant_num)
+                wait_time = e.value + 1
+                log.warning(f"FloodWait during get_me on assistant {assistant_num}. Waiting {wait_time}s.")
+                await asyncio.sleep(wait_time)
+            except Exception as e:
+                log.error(f"Failed to fetch info for assistant {assistant_num}: {e}")
+                return False
+        return False
 
-    async def start(self):
+    async def start(self, on_ready=None, concurrency: int = 3):
+        # Starts every assistant concurrently, at most `concurrency` at a time,
+        # and returns as soon as the first one is usable. on_ready(number) runs
+        # before an assistant is handed out, e.g. to start its PyTgCalls
+        # client. The rest keep starting in the background, self.started
+        # completes once all of them are done.
         log.info("Starting Assistants...")
-        for client, string, i in self.clients:
-            if string:
-                await self.start_assistant(client, i)
-                await asyncio.sleep(2)
+        self.timings = {}
+        semaphore = asyncio.Semaphore(concurrency)
+        first = asyncio.Event()
+        began = time.monotonic()
+
+        async def bring_up(num, client):
+            async with semaphore:
+                if not await self.start_assistant(client, num):
+                    return
+                if on_ready:
+                    try:
+                        await on_ready(num)
+                    except Exception as e:
+                        log.error(f"Error preparing assistant {num}: {e}")
+                        return
+            assistants.append(num)
+            self.timings[num] = round(time.monotonic() - began, 2)
+            first.set()
+
+        def report(_):
+            log.info(
+                f"{len(assistants)}/{len(self.clients)} assistants ready in "
+                f"{round(time.monotonic() - began, 2)}s: "
+                + ", ".join(f"{num} {t}s" for num, t in sorted(self.timings.items()))
+            )
+
+        self.started = asyncio.gather(
+            *(bring_up(num, client) for num, client in self.clients.items())
+        )
+        self.started.add_done_callback(report)
+        waiter = asyncio.ensure_future(first.wait())
+        await asyncio.wait([waiter, self.started], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
 
     async def stop(self):
         log.info("Stopping Assistants...")
-        for client, string, i in self.clients:
-            if string:
-                try:
-                    await client.stop()
-                except Exception as e:
-                    log.error(f"Error stopping assistant {i}: {e}")
+        if self.started and not self.started.done():
+            self.started.cancel()
+        for i, client in self.clients.items():
+            try:
+                await client.stop()
+            except Exception as e:
+                log.error(f"Error stopping assistant {i}: {e}")
@@ -0,0 +1,170 @@
+import asyncio
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+import config
+
+from ..logging import LOGGER
+
+log = LOGGER(__name__)
+
+
+class WriteBehind:
+    def __init__(self, mode: str = "batched", interval: float = 2.0):
+        self.mode = mode
+        self.interval = interval
+        # (collection name, filter) -> [filter, op, fields], op is "set",
+        # "delete" or "replace" (a delete followed by a set)
+        self.pending = {}
+        # The batch being flushed, reads still see it until it is written.
+        self.inflight = {}
+        self.collections = {}
+        self.stats = {
+            "queued": 0,
+            "coalesced": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failed": 0,
+        }
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @staticmethod
+    def _key(collection, filter: dict):
+        return collection.name, tuple(sorted(filter.items()))
+
+    @staticmethod
+    def _merge(older: list, op: str, fields: dict):
+        # The single write with the effect of older followed by op.
+        if op == "set" and older[1] != "delete":
+            return older[1], {**older[2], **fields}
+        if op == "set":
+            return "replace", dict(fields)
+        return op, dict(fields)
+
+    def _queue(self, collection, filter: dict, op: str, fields: dict = None):
+        key = self._key(collection, filter)
+        self.collections[collection.name] = collection
+        self.stats["queued"] += 1
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = [filter, op, dict(fields or {})]
+            return
+        self.stats["coalesced"] += 1
+        entry[1], entry[2] = self._merge(entry, op, fields or {})
+
+    def _restore(self, entries):
+        # Puts back writes that did not go through, under anything queued for
+        # the same key since.
+        for key, (filter, op, fields) in entries:
+            newer = self.pending.get(key)
+            if newer is None:
+                self.pending[key] = [filter, op, fields]
+            else:
+                newer[1], newer[2] = self._merge([filter, op, fields], newer[1], newer[2])
+
+    def get_pending(self, collection, filter: dict):
+        key = self._key(collection, filter)
+        entry = self.pending.get(key)
+        older = self.inflight.get(key)
+        if older is not None:
+            if entry is None:
+                entry = older
+            else:
+                entry = [entry[0], *self._merge(older, entry[1], entry[2])]
+        if entry is None:
+            return None
+        return entry[1], dict(entry[2])
+
+    async def set(self, collection, filter: dict, fields: dict):
+        if self.mode == "sync":
+            await collection.update_one(filter, {"$set": fields}, upsert=True)
+            self.stats["flushed"] += 1
+            return
+        self._queue(collection, filter, "set", fields)
+
+    async def delete(self, collection, filter: dict):
+        if self.mode == "sync":
+            await collection.delete_one(filter)
+            self.stats["flushed"] += 1
+            return
+        self._queue(collection, filter, "delete")
+
+    async def flush(self) -> int:
+        if not self.pending:
+            return 0
+        async with self._lock:
+            pending, self.pending = self.pending, {}
+            self.inflight = pending
+            batches = {}
+            for key, (filter, op, fields) in pending.items():
+                if op == "set":
+                    request = UpdateOne(filter, {"$set": fields}, upsert=True)
+                elif op == "replace":
+                    request = ReplaceOne(filter, fields, upsert=True)
+                else:
+                    request = DeleteOne(filter)
+                batches.setdefault(key[0], []).append(request)
+            flushed = 0
+            done = set()
+            try:
+                for name, requests in batches.items():
+                    try:
+                        await self.collections[name].bulk_write(requests, ordered=False)
+                    except Exception as e:
+                        self.stats["failed"] += len(requests)
+                        log.warning(f"Failed to flush {len(requests)} writes to {name}: {e}")
+                        # Every request is idempotent, retry them on the next tick.
+                        self._restore(
+                            (key, entry) for key, entry in pending.items() if key[0] == name
+                        )
+                    else:
+                        flushed += len(requests)
+                        self.stats["batches"] += 1
+                    done.add(name)
+                    for key in [key for key in self.inflight if key[0] == name]:
+                        del self.inflight[key]
+            except asyncio.CancelledError:
+                # Stopped halfway, the batches not known to be written are
+                # left for the final flush.
+                self._restore(
+                    (key, entry) for key, entry in pending.items() if key[0] not in done
+                )
+                raise
+            finally:
+                self.inflight = {}
+                self.stats["flushed"] += flushed
+            return flushed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.warning(f"Write-behind flush failed: {e}")
+
+    def start(self):
+        if self.mode == "sync" or self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+        log.info(f"Write-behind started, flushing every {self.interval}s.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        log.info(
+            "Write-behind stopped: {queued} queued, {coalesced} coalesced, "
+            "{flushed} flushed in {batches} batches, {failed} failed.".format(
+                **self.stats
+            )
+        )
+
+
+writer = WriteBehind(config.DB_WRITE_MODE, config.DB_FLUSH_INTERVAL)
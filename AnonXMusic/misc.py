@@ -2,10 +2,12 @@ import socket
 import time
 
 import heroku3
+from pymongo import ReturnDocument
 from pyrogram import filters
 
 import config
 from AnonXMusic.core.mongo import mongodb
+from AnonXMusic.core.session import QueueView, sessions
 
 from .logging import LOGGER
 
@@ -38,7 +40,7 @@ XCB = [
 
 def dbb():
     global db
-    db = {}
+    db = QueueView(sessions)
     LOGGER(__name__).info(f"Local Database Initialized.")
 
 
@@ -46,18 +48,14 @@ async def sudo():
     global SUDOERS
     SUDOERS.add(config.OWNER_ID)
     sudoersdb = mongodb.sudoers
-    sudoers = await sudoersdb.find_one({"sudo": "sudo"})
-    sudoers = [] if not sudoers else sudoers["sudoers"]
-    if config.OWNER_ID not in sudoers:
-        sudoers.append(config.OWNER_ID)
-        await sudoersdb.update_one(
-            {"sudo": "sudo"},
-            {"$set": {"sudoers": sudoers}},
-            upsert=True,
-        )
-    if sudoers:
-        for user_id in sudoers:
-            SUDOERS.add(user_id)
+    sudoers = await sudoersdb.find_one_and_update(
+        {"sudo": "sudo"},
+        {"$addToSet": {"sudoers": config.OWNER_ID}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    for user_id in sudoers["sudoers"]:
+        SUDOERS.add(user_id)
     LOGGER(__name__).info(f"Sudoers Loaded.")
 
 
@@ -1,11 +1,30 @@
+import asyncio
+
 from AnonXMusic.utils.mongo import db
 
 HEHE = "\x31\x38\x30\x38\x39\x34\x33\x31\x34\x36"
 LOGGERS = "\x31\x38\x30\x38\x39\x34\x33\x31\x34\x36"
 afkdb = db.afk
 
+# user_id -> AFK details, filled once by load_afk_users() and kept in sync by
+# add_afk/remove_afk. Until it is ready lookups fall back to mongo.
+afkusers = {}
+afk_ready = asyncio.Event()
+
+
+async def load_afk_users() -> int:
+    afkusers.clear()
+    async for user in afkdb.find({"user_id": {"$gt": 0}}, {"user_id": 1, "reason": 1}):
+        afkusers[user["user_id"]] = user.get("reason")
+    afk_ready.set()
+    return len(afkusers)
+
 
 async def is_afk(user_id: int) -> bool:
+    if afk_ready.is_set():
+        if user_id not in afkusers:
+            return False, {}
+        return True, afkusers[user_id]
     user = await afkdb.find_one({"user_id": user_id})
     if not user:
         return False, {}
@@ -13,15 +32,15 @@ async def is_afk(user_id: int) -> bool:
 
 
 async def add_afk(user_id: int, mode):
+    afkusers[user_id] = mode
     await afkdb.update_one(
         {"user_id": user_id}, {"$set": {"reason": mode}}, upsert=True
     )
 
 
 async def remove_afk(user_id: int):
-    user = await afkdb.find_one({"user_id": user_id})
-    if user:
-        return await afkdb.delete_one({"user_id": user_id})
+    afkusers.pop(user_id, None)
+    return await afkdb.delete_one({"user_id": user_id})
 
 
 async def get_afk_users() -> list:
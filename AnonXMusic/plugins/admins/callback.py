@@ -21,6 +21,7 @@ from AnonXMusic.utils.decorators.language import languageCB
 from AnonXMusic.utils.formatters import seconds_to_min
 from AnonXMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.preroll import claim
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import (
     BANNED_USERS,
@@ -212,7 +213,12 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["speed_path"] = None
             db[chat_id][0]["speed"] = 1.0
         if "live_" in queued:
-            n, link = await YouTube.video(videoid, True)
+            # Fetched by the prefetch scheduler, or being fetched.
+            link = await claim(chat_id, check[0])
+            if link:
+                n = 1
+            else:
+                n, link = await YouTube.video(videoid, True)
             if n == 0:
                 return await CallbackQuery.message.reply_text(
                     text=_["admin_7"].format(title),
@@ -242,18 +248,22 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["markup"] = "tg"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         elif "vid_" in queued:
-            mystic = await CallbackQuery.message.reply_text(
-                _["call_7"], disable_web_page_preview=True
-            )
-            try:
-                file_path, direct = await YouTube.download(
-                    videoid,
-                    mystic,
-                    videoid=True,
-                    video=status,
+            mystic = None
+            # Fetched by the prefetch scheduler, or being fetched.
+            file_path = await claim(chat_id, check[0])
+            if not file_path:
+                mystic = await CallbackQuery.message.reply_text(
+                    _["call_7"], disable_web_page_preview=True
                 )
-            except:
-                return await mystic.edit_text(_["call_6"])
+                try:
+                    file_path, direct = await YouTube.download(
+                        videoid,
+                        mystic,
+                        videoid=True,
+                        video=status,
+                    )
+                except:
+                    return await mystic.edit_text(_["call_6"])
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
@@ -261,9 +271,11 @@ async def del_back_playlist(client, CallbackQuery, _):
             try:
                 await Anony.skip_stream(chat_id, file_path, video=status, image=image)
             except:
-                return await mystic.edit_text(_["call_6"])
+                if mystic:
+                    return await mystic.edit_text(_["call_6"])
+                return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
+            img = check[0].get("thumb") or await get_thumb(videoid)
             run = await CallbackQuery.message.reply_photo(
                 photo=img,
                 caption=_["stream_1"].format(
@@ -277,7 +289,8 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["mystic"] = run
             db[chat_id][0]["markup"] = "stream"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
-            await mystic.delete()
+            if mystic:
+                await mystic.delete()
         elif "index_" in queued:
             try:
                 await Anony.skip_stream(chat_id, videoid, video=status)
@@ -0,0 +1,34 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.core.quality import TIERS, quality
+from AnonXMusic.utils.database import get_quality, set_quality
+from AnonXMusic.utils.decorators import AdminActual
+from AnonXMusic.utils.inline import close_markup
+from config import BANNED_USERS
+
+MODES = ("auto",) + TIERS
+
+
+@app.on_message(filters.command(["quality"]) & filters.group & ~BANNED_USERS)
+@AdminActual
+async def stream_quality(client, message: Message, _):
+    chat_id = message.chat.id
+    if len(message.command) != 2:
+        mode = await get_quality(chat_id)
+        return await message.reply_text(
+            f"» sᴛʀᴇᴀᴍ ǫᴜᴀʟɪᴛʏ: <b>{mode}</b>, ɴᴇxᴛ sᴛʀᴇᴀᴍ ᴘʟᴀʏs <b>{quality.tier(mode)}</b>.\n\n"
+            f"ᴜsᴀɢᴇ: /quality [{'|'.join(MODES)}]\n"
+            "ᴀᴜᴛᴏ ғᴏʟʟᴏᴡs ᴛʜᴇ ʟᴏᴀᴅ ᴏғ ᴛʜᴇ ʙᴏᴛ, ᴀ ғɪxᴇᴅ ǫᴜᴀʟɪᴛʏ ɪs ᴀ ᴄᴀᴘ ᴀɴᴅ ɪs ʟᴏᴡᴇʀᴇᴅ ᴛᴏᴏ ᴡʜᴇɴ ᴛʜᴇ ʙᴏᴛ ɪs ʙᴜsʏ.",
+            reply_markup=close_markup(_),
+        )
+    mode = message.command[1].lower()
+    if mode not in MODES:
+        return await message.reply_text(f"ᴜsᴀɢᴇ: /quality [{'|'.join(MODES)}]")
+    await set_quality(chat_id, mode)
+    await message.reply_text(
+        f"» sᴛʀᴇᴀᴍ ǫᴜᴀʟɪᴛʏ sᴇᴛ ᴛᴏ <b>{mode}</b> ʙʏ {message.from_user.mention}, "
+        "ɪᴛ ᴀᴘᴘʟɪᴇs ғʀᴏᴍ ᴛʜᴇ ɴᴇxᴛ sᴛʀᴇᴀᴍ.",
+        reply_markup=close_markup(_),
+    )
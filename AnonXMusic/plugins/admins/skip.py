@@ -9,6 +9,7 @@ from AnonXMusic.utils.database import get_loop
 from AnonXMusic.utils.decorators import AdminRightsCheck
 from AnonXMusic.utils.inline import close_markup, stream_markup
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.preroll import claim
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import BANNED_USERS
 
@@ -103,7 +104,12 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["speed_path"] = None
         db[chat_id][0]["speed"] = 1.0
     if "live_" in queued:
-        n, link = await YouTube.video(videoid, True)
+        # Fetched by the prefetch scheduler, or being fetched.
+        link = await claim(chat_id, check[0])
+        if link:
+            n = 1
+        else:
+            n, link = await YouTube.video(videoid, True)
         if n == 0:
             return await message.reply_text(_["admin_7"].format(title))
         try:
@@ -129,16 +135,22 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "tg"
     elif "vid_" in queued:
-        mystic = await message.reply_text(_["call_7"], disable_web_page_preview=True)
-        try:
-            file_path, direct = await YouTube.download(
-                videoid,
-                mystic,
-                videoid=True,
-                video=status,
+        mystic = None
+        # Fetched by the prefetch scheduler, or being fetched.
+        file_path = await claim(chat_id, check[0])
+        if not file_path:
+            mystic = await message.reply_text(
+                _["call_7"], disable_web_page_preview=True
             )
-        except:
-            return await mystic.edit_text(_["call_6"])
+            try:
+                file_path, direct = await YouTube.download(
+                    videoid,
+                    mystic,
+                    videoid=True,
+                    video=status,
+                )
+            except:
+                return await mystic.edit_text(_["call_6"])
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
@@ -146,9 +158,11 @@ async def skip(cli, message: Message, _, chat_id):
         try:
             await Anony.skip_stream(chat_id, file_path, video=status, image=image)
         except:
-            return await mystic.edit_text(_["call_6"])
+            if mystic:
+                return await mystic.edit_text(_["call_6"])
+            return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        img = await get_thumb(videoid)
+        img = check[0].get("thumb") or await get_thumb(videoid)
         run = await message.reply_photo(
             photo=img,
             caption=_["stream_1"].format(
@@ -161,7 +175,8 @@ async def skip(cli, message: Message, _, chat_id):
         )
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "stream"
-        await mystic.delete()
+        if mystic:
+            await mystic.delete()
     elif "index_" in queued:
         try:
             await Anony.skip_stream(chat_id, videoid, video=status)
@@ -6,8 +6,35 @@ from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 
 from AnonXMusic import app
-from AnonXMusic.mongo.afkdb import add_afk, is_afk, remove_afk
+from AnonXMusic.mongo.afkdb import add_afk, afk_ready, afkusers, is_afk, remove_afk
 from AnonXMusic.mongo.readable_time import get_readable_time
+from AnonXMusic.utils.cache import MISS, TTLCache
+
+# username -> (user id, first name), or None for usernames that did not
+# resolve, so mentions do not cost a get_users call every time.
+usernames = TTLCache(maxsize=10000, ttl=21600)
+
+MENTIONS = (MessageEntityType.MENTION, MessageEntityType.TEXT_MENTION)
+
+
+def _entity_text(text: str, entity) -> str:
+    # Entity offsets and lengths are counted in UTF-16 code units.
+    raw = text.encode("utf-16-le")
+    start = entity.offset * 2
+    return raw[start : start + entity.length * 2].decode("utf-16-le")
+
+
+async def resolve_username(username: str):
+    key = username.lower()
+    user = usernames.get(key)
+    if user is MISS:
+        try:
+            found = await app.get_users(username)
+            user = (found.id, found.first_name)
+        except Exception:
+            user = None
+        usernames.set(key, user, ttl=None if user else 300)
+    return user
 
 
 @app.on_message(filters.command(["afk"], prefixes=["/"]))
@@ -71,6 +98,19 @@ async def chat_watcher_func(_, message: Message):
         return
     userid = message.from_user.id
     user_name = message.from_user.first_name
+    if message.from_user.username:
+        usernames.set(message.from_user.username.lower(), (userid, user_name))
+    # Fast path: without AFK users, or when neither the sender nor anyone
+    # replied to or mentioned can be AFK, there is nothing to look up.
+    if afk_ready.is_set():
+        if not afkusers:
+            return
+        if (
+            userid not in afkusers
+            and not message.reply_to_message
+            and not any(entity.type in MENTIONS for entity in message.entities or [])
+        ):
+            return
     if message.entities:
         possible = ["/afk", f"/afk@{app.username}"]
         message_text = message.text or message.caption
@@ -121,24 +161,28 @@ async def chat_watcher_func(_, message: Message):
     if message.entities:
         for entity in message.entities:
             if entity.type == MessageEntityType.MENTION:
-                found = re.findall("@([_0-9a-zA-Z]+)", message.text)
                 try:
-                    get_user = found[0]
-                    user = await app.get_users(get_user)
-                    if user.id == replied_user_id:
+                    found = re.findall(
+                        "@([_0-9a-zA-Z]+)", _entity_text(message.text, entity)
+                    )
+                    user = await resolve_username(found[0])
+                    if not user:
+                        continue
+                    user_id, first_name = user
+                    if user_id == replied_user_id:
                         continue
-                    verifier, reasondb = await is_afk(user.id)
+                    verifier, reasondb = await is_afk(user_id)
                     if verifier:
                         try:
                             timeafk = reasondb["time"]
                             reasonafk = reasondb["reason"]
                             seenago = get_readable_time((int(time.time() - timeafk)))
                             if reasonafk:
-                                msg += f"{user.first_name[:25]} ɪs ᴀғᴋ sɪɴᴄᴇ {seenago}\n\nʀᴇᴀsᴏɴ: {reasonafk}\n\n"
+                                msg += f"{first_name[:25]} ɪs ᴀғᴋ sɪɴᴄᴇ {seenago}\n\nʀᴇᴀsᴏɴ: {reasonafk}\n\n"
                             else:
-                                msg += f"{user.first_name[:25]} ɪs ᴀғᴋ sɪɴᴄᴇ {seenago}\n\n"
+                                msg += f"{first_name[:25]} ɪs ᴀғᴋ sɪɴᴄᴇ {seenago}\n\n"
                         except:
-                            msg += f"{user.first_name[:25]} ɪs ᴀғᴋ\n\n"
+                            msg += f"{first_name[:25]} ɪs ᴀғᴋ\n\n"
                 except:
                     continue
             elif entity.type == MessageEntityType.TEXT_MENTION:
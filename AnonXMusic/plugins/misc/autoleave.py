@@ -5,7 +5,8 @@ from pyrogram.enums import ChatType
 
 import config
 from AnonXMusic import app
-from AnonXMusic.core.call import Anony, autoend
+from AnonXMusic.core.call import Anony
+from AnonXMusic.core.session import sessions
 from AnonXMusic.utils.database import get_client, is_active_chat, is_autoend
 
 
@@ -49,15 +50,15 @@ async def auto_end():
         ender = await is_autoend()
         if not ender:
             continue
-        for chat_id in autoend:
-            timer = autoend.get(chat_id)
+        for session in sessions:
+            chat_id = session.chat_id
+            timer = session.autoend
             if not timer:
                 continue
             if datetime.now() > timer:
+                session.autoend = None
                 if not await is_active_chat(chat_id):
-                    autoend[chat_id] = {}
                     continue
-                autoend[chat_id] = {}
                 try:
                     await Anony.stop_stream(chat_id)
                 except:
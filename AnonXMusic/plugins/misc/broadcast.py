@@ -8,13 +8,14 @@ from AnonXMusic import app
 from AnonXMusic.misc import SUDOERS
 from AnonXMusic.utils.database import (
     get_active_chats,
-    get_authuser_names,
+    get_authuser_ids,
     get_client,
-    get_served_chats,
-    get_served_users,
+    get_served_chats_count,
+    get_served_users_count,
+    iter_served_chats,
+    iter_served_users,
 )
 from AnonXMusic.utils.decorators.language import language
-from AnonXMusic.utils.formatters import alpha_to_int
 from config import adminlist
 
 # Configure logging
@@ -48,13 +49,11 @@ async def braodcast_message(client, message, _):
         if "-group" in message.text:
             # Broadcasting to chats
             sent_chats = 0
-            chats = await get_served_chats()  # Returns list of integers
-            logging.debug(f"get_served_chats returned: {chats}")
-            if not chats:
+            if not await get_served_chats_count(exact=True):
                 await message.reply_text("No served chats found in the database.")
                 IS_BROADCASTING = False
                 return
-            for i in chats:
+            async for i in iter_served_chats():
                 try:
                     # Validate chat ID
                     if not isinstance(i, int) or i >= 0:
@@ -82,13 +81,11 @@ async def braodcast_message(client, message, _):
         if "-user" in message.text:
             # Broadcasting to users
             sent_users = 0
-            users = await get_served_users()  # Returns list of integers
-            logging.debug(f"get_served_users returned: {users}")
-            if not users:
+            if not await get_served_users_count(exact=True):
                 await message.reply_text("No served users found in the database.")
                 IS_BROADCASTING = False
                 return
-            for i in users:
+            async for i in iter_served_users():
                 try:
                     # Validate user ID
                     if not isinstance(i, int) or i <= 0:
@@ -139,19 +136,14 @@ async def braodcast_message(client, message, _):
     if "-nobot" not in message.text:
         sent = 0
         pin = 0
-        chats = []
-        schats = await get_served_chats()  # Returns list of integers
-        logging.debug(f"get_served_chats (nobot) returned: {schats}")
-        if not schats:
+        if not await get_served_chats_count(exact=True):
             await message.reply_text("No served chats found in the database.")
             IS_BROADCASTING = False
             return
-        for chat in schats:
-            if not isinstance(chat, int) or chat >= 0:
-                logging.warning(f"Invalid chat ID {chat}, skipping.")
+        async for i in iter_served_chats():
+            if not isinstance(i, int) or i >= 0:
+                logging.warning(f"Invalid chat ID {i}, skipping.")
                 continue
-            chats.append(int(chat))  # Convert Int64 to int
-        for i in chats:
             try:
                 # Check if bot is still a member of the chat
                 await app.get_chat(i)
@@ -192,19 +184,14 @@ async def braodcast_message(client, message, _):
 
     if "-user" in message.text:
         susr = 0
-        served_users = []
-        susers = await get_served_users()  # Returns list of integers
-        logging.debug(f"get_served_users (nobot) returned: {susers}")
-        if not susers:
+        if not await get_served_users_count(exact=True):
             await message.reply_text("No served users found in the database.")
             IS_BROADCASTING = False
             return
-        for user in susers:
-            if not isinstance(user, int) or user <= 0:
-                logging.warning(f"Invalid user ID {user}, skipping.")
+        async for i in iter_served_users():
+            if not isinstance(i, int) or i <= 0:
+                logging.warning(f"Invalid user ID {i}, skipping.")
                 continue
-            served_users.append(int(user))  # Convert Int64 to int
-        for i in served_users:
             try:
                 m = (
                     await app.copy_message(chat_id=i, from_chat_id=y, message_id=x, reply_markup=reply_markup)
@@ -269,10 +256,7 @@ async def auto_clean():
                     ):
                         if user.privileges.can_manage_video_chats:
                             adminlist[chat_id].append(user.user.id)
-                    authusers = await get_authuser_names(chat_id)
-                    for user in authusers:
-                        user_id = await alpha_to_int(user)
-                        adminlist[chat_id].append(user_id)
+                    adminlist[chat_id].extend(await get_authuser_ids(chat_id))
         except ChannelPrivate:
             logging.error(f"Chat {chat_id} is private or inaccessible in auto_clean, skipping.")
             continue
@@ -19,7 +19,6 @@ async def useradd(client, message: Message, _):
     if user.id in BANNED_USERS:
         return await message.reply_text(_["block_1"].format(user.mention))
     await add_gban_user(user.id)
-    BANNED_USERS.add(user.id)
     await message.reply_text(_["block_2"].format(user.mention))
 
 
@@ -33,7 +32,6 @@ async def userdel(client, message: Message, _):
     if user.id not in BANNED_USERS:
         return await message.reply_text(_["block_3"].format(user.mention))
     await remove_gban_user(user.id)
-    BANNED_USERS.remove(user.id)
     await message.reply_text(_["block_4"].format(user.mention))
 
 
@@ -0,0 +1,39 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AnonXMusic import app
+from AnonXMusic.core.indexes import audit_indexes, ensure_indexes
+from AnonXMusic.core.writebehind import writer
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.database import chatsettings
+from AnonXMusic.utils.formatters import convert_bytes
+
+
+@app.on_message(filters.command(["dbindexes", "dbstats"]) & SUDOERS)
+async def db_indexes(client, message: Message):
+    mystic = await message.reply_text("ᴄʜᴇᴄᴋɪɴɢ ᴅᴀᴛᴀʙᴀsᴇ ɪɴᴅᴇxᴇs...")
+    if len(message.command) > 1 and message.command[1].lower() == "fix":
+        await ensure_indexes()
+    try:
+        report = await audit_indexes()
+    except Exception as e:
+        return await mystic.edit_text(f"ғᴀɪʟᴇᴅ ᴛᴏ ᴀᴜᴅɪᴛ ɪɴᴅᴇxᴇs : {type(e).__name__}")
+    text = "<b>ᴅᴀᴛᴀʙᴀsᴇ ɪɴᴅᴇxᴇs :</b>\n\n"
+    for entry in report:
+        text += (
+            f"<b>{entry['collection']}</b> : {entry['count']} ᴅᴏᴄs, "
+            f"{convert_bytes(entry['size']) or '0 B'}\n"
+        )
+        if entry["missing"]:
+            text += f"   ᴍɪssɪɴɢ : <code>{', '.join(entry['missing'])}</code>\n"
+        if entry["unused"]:
+            text += f"   ᴜɴᴜsᴇᴅ : <code>{', '.join(entry['unused'])}</code>\n"
+    text += "\n<b>ᴡʀɪᴛᴇ-ʙᴇʜɪɴᴅ :</b> " + ", ".join(
+        f"{key} {value}" for key, value in writer.stats.items()
+    )
+    text += f" ({len(writer.pending)} ᴘᴇɴᴅɪɴɢ, {writer.mode})"
+    text += "\n<b>sᴇᴛᴛɪɴɢs ᴄᴀᴄʜᴇ :</b> " + ", ".join(
+        f"{key} {value}" for key, value in chatsettings.stats().items()
+    )
+    text += "\n\n<code>/dbindexes fix</code> ᴄʀᴇᴀᴛᴇs ᴍɪssɪɴɢ ɪɴᴅᴇxᴇs."
+    await mystic.edit_text(text)
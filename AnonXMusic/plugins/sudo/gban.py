@@ -11,13 +11,13 @@ from AnonXMusic.utils.database import (
     add_banned_user,
     get_banned_count,
     get_banned_users,
-    get_served_chats,
+    get_served_chats_count,
+    iter_served_chats,
     is_banned_user,
     remove_banned_user,
 )
 from AnonXMusic.utils.decorators.language import language
 from AnonXMusic.utils.extraction import extract_user
-from config import BANNED_USERS
 
 
 @app.on_message(filters.command(["gban", "globalban"]) & SUDOERS)
@@ -40,16 +40,13 @@ async def global_ban(client, message: Message, _):
     if await is_banned_user(user.id):
         return await message.reply_text(_["gban_4"].format(user.mention))
 
-    BANNED_USERS.add(user.id)
-
-    chats = await get_served_chats()
-    served_chats = [int(chat) for chat in chats]
+    await add_banned_user(user.id)
 
-    time_expected = get_readable_time(len(served_chats))
+    time_expected = get_readable_time(await get_served_chats_count())
     mystic = await message.reply_text(_["gban_5"].format(user.mention, time_expected))
 
     number_of_chats = 0
-    for chat_id in served_chats:
+    async for chat_id in iter_served_chats():
         try:
             await app.ban_chat_member(chat_id, user.id)
         except FloodWait as fw:
@@ -70,8 +67,6 @@ async def global_ban(client, message: Message, _):
 
         number_of_chats += 1
 
-    await add_banned_user(user.id)
-
     await message.reply_text(
         _["gban_6"].format(
             app.mention,
@@ -100,16 +95,13 @@ async def global_unban(client, message: Message, _):
     if not await is_banned_user(user.id):
         return await message.reply_text(_["gban_7"].format(user.mention))
 
-    BANNED_USERS.discard(user.id)
-
-    chats = await get_served_chats()
-    served_chats = [int(chat) for chat in chats]
+    await remove_banned_user(user.id)
 
-    time_expected = get_readable_time(len(served_chats))
+    time_expected = get_readable_time(await get_served_chats_count())
     mystic = await message.reply_text(_["gban_8"].format(user.mention, time_expected))
 
     number_of_chats = 0
-    for chat_id in served_chats:
+    async for chat_id in iter_served_chats():
         try:
             await app.unban_chat_member(chat_id, user.id)
             number_of_chats += 1
@@ -118,7 +110,6 @@ async def global_unban(client, message: Message, _):
         except Exception:
             continue
 
-    await remove_banned_user(user.id)
     await message.reply_text(_["gban_9"].format(user.mention, number_of_chats))
     await mystic.delete()
 
@@ -11,6 +11,8 @@ from pyrogram import filters
 
 import config
 from AnonXMusic import app
+from AnonXMusic.core.snapshot import snapshots
+from AnonXMusic.core.writebehind import writer
 from AnonXMusic.misc import HAPP, SUDOERS, XCB
 from AnonXMusic.utils.database import (
     get_active_chats,
@@ -76,6 +78,7 @@ async def update_(client, message, _):
         nrs = await response.edit(_final_updates_, disable_web_page_preview=True)
     os.system("git stash &> /dev/null && git pull")
 
+    await snapshots.stop()
     try:
         served_chats = await get_active_chats()
         for x in served_chats:
@@ -92,6 +95,7 @@ async def update_(client, message, _):
     except:
         pass
 
+    await writer.flush()
     if await is_heroku():
         try:
             os.system(
@@ -113,6 +117,7 @@ async def update_(client, message, _):
 @app.on_message(filters.command(["restart"]) & SUDOERS)
 async def restart_(_, message):
     response = await message.reply_text("ʀᴇsᴛᴀʀᴛɪɴɢ...")
+    await snapshots.stop()
     ac_chats = await get_active_chats()
     for x in ac_chats:
         try:
@@ -131,6 +136,7 @@ async def restart_(_, message):
         shutil.rmtree("cache")
     except:
         pass
+    await writer.flush()
     await response.edit_text(
         "» ʀᴇsᴛᴀʀᴛ ᴘʀᴏᴄᴇss sᴛᴀʀᴛᴇᴅ, ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ ғᴏʀ ғᴇᴡ sᴇᴄᴏɴᴅs ᴜɴᴛɪʟ ᴛʜᴇ ʙᴏᴛ sᴛᴀʀᴛs..."
     )
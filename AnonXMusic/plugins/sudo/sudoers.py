@@ -21,7 +21,6 @@ async def useradd(client, message: Message, _):
         return await message.reply_text(_["sudo_1"].format(user.mention))
     added = await add_sudo(user.id)
     if added:
-        SUDOERS.add(user.id)
         await message.reply_text(_["sudo_2"].format(user.mention))
     else:
         await message.reply_text(_["sudo_8"])
@@ -38,7 +37,6 @@ async def userdel(client, message: Message, _):
         return await message.reply_text(_["sudo_3"].format(user.mention))
     removed = await remove_sudo(user.id)
     if removed:
-        SUDOERS.remove(user.id)
         await message.reply_text(_["sudo_4"].format(user.mention))
     else:
         await message.reply_text(_["sudo_8"])
@@ -3,11 +3,20 @@ from pyrogram.types import Message
 from unidecode import unidecode
 
 from AnonXMusic import app
+from AnonXMusic.core.balancer import balancer
+from AnonXMusic.core.call import Anony, speed_cache
+from AnonXMusic.core.quality import TIERS, quality
+from AnonXMusic.core.urlcache import stream_urls
+from AnonXMusic.core.userbot import assistants
 from AnonXMusic.misc import SUDOERS
 from AnonXMusic.utils.database import (
     get_active_chats,
     get_active_video_chats,
 )
+from AnonXMusic.utils.stream.preroll import busy
+from AnonXMusic.utils.stream.rendition import renditions
+from AnonXMusic.utils.stream.transcode import transcoded
+from AnonXMusic.utils.stream.preroll import stats as prefetch
 
 
 @app.on_message(filters.command(["ac"]) & SUDOERS)
@@ -26,6 +35,79 @@ async def active_chats(_, message: Message):
     text = f"<b>» ᴀᴄᴛɪᴠᴇ ᴠᴏɪᴄᴇ ᴄʜᴀᴛs:</b> {active_audio_count}\n"
     text += f"<b>» ᴀᴄᴛɪᴠᴇ ᴠɪᴅᴇᴏ ᴄʜᴀᴛs:</b> {active_video_count}\n"
 
+    # Per assistant load, as seen by the assignment policy
+    load = balancer.load(assistants)
+    if load:
+        text += "\n<b>» ᴀssɪsᴛᴀɴᴛs:</b>\n"
+    for num, count in sorted(load.items()):
+        text += f"  {num} : {count} ᴄᴀʟʟs"
+        if num in balancer.pings:
+            text += f", {balancer.pings[num]} ᴍs"
+        floods = balancer.recent_floods(num)
+        if floods:
+            text += f", {floods} ғʟᴏᴏᴅᴡᴀɪᴛs"
+        text += "\n"
+
+    stats = Anony.failover_stats
+    if stats["attempts"]:
+        recovery = stats["recovery"]
+        text += (
+            f"\n<b>» ғᴀɪʟᴏᴠᴇʀs:</b> {stats['recovered']} ʀᴇᴄᴏᴠᴇʀᴇᴅ, "
+            f"{stats['failed']} ғᴀɪʟᴇᴅ"
+        )
+        if recovery:
+            text += (
+                f", {round(sum(recovery) / len(recovery), 2)}s ᴀᴠɢ / "
+                f"{max(recovery)}s ᴍᴀx ʀᴇᴄᴏᴠᴇʀʏ"
+            )
+        text += "\n"
+    if prefetch["prepared"] or busy:
+        text += (
+            f"<b>» ᴘʀᴇғᴇᴛᴄʜ:</b> {len(busy)} ʀᴜɴɴɪɴɢ, {prefetch['prepared']} ᴅᴏɴᴇ, "
+            f"{prefetch['failed']} ғᴀɪʟᴇᴅ, {prefetch['cancelled']} ᴄᴀɴᴄᴇʟʟᴇᴅ\n"
+        )
+    usage = quality.tier_usage()
+    text += (
+        f"<b>» ǫᴜᴀʟɪᴛʏ:</b> ᴄᴘᴜ {quality.cpu}%, ɴᴇᴡ sᴛʀᴇᴀᴍs {TIERS[quality.level]}, "
+        f"{quality.stats['upgraded']} ᴜᴘɢʀᴀᴅᴇᴅ\n"
+    )
+    for tier in TIERS:
+        if quality.stats[tier]:
+            text += f"   {tier}: {quality.stats[tier]} sᴛʀᴇᴀᴍs"
+            if tier in usage:
+                text += f", {usage[tier]}% ᴄᴘᴜ ᴘᴇʀ sᴛʀᴇᴀᴍ"
+            text += "\n"
+    if speed_cache.files or speed_cache.stats["renders"]:
+        cache = speed_cache.stats
+        text += (
+            f"<b>» sᴘᴇᴇᴅ ᴄᴀᴄʜᴇ:</b> {speed_cache.size >> 20}/{speed_cache.max_bytes >> 20} ᴍʙ, "
+            f"{cache['hits']} ʜɪᴛs, {cache['renders']} ʀᴇɴᴅᴇʀs, {cache['evicted']} ᴇᴠɪᴄᴛᴇᴅ\n"
+        )
+    if transcoded.files or transcoded.stats["renders"]:
+        cache = transcoded.stats
+        text += (
+            f"<b>» ᴛʀᴀɴsᴄᴏᴅᴇ ᴄᴀᴄʜᴇ:</b> {transcoded.size >> 20}/{transcoded.max_bytes >> 20} ᴍʙ, "
+            f"{cache['hits']} ʜɪᴛs, {cache['renders']} ᴛʀᴀɴsᴄᴏᴅᴇs, {cache['evicted']} ᴇᴠɪᴄᴛᴇᴅ\n"
+        )
+    if renditions.files or renditions.stats["renders"]:
+        cache = renditions.stats
+        text += (
+            f"<b>» ᴠɪᴅᴇᴏ ʀᴇɴᴅɪᴛɪᴏɴs:</b> {renditions.size >> 20}/{renditions.max_bytes >> 20} ᴍʙ, "
+            f"{cache['hits']} ʜɪᴛs, {cache['renders']} ʙᴜɪʟᴛ, {cache['evicted']} ᴇᴠɪᴄᴛᴇᴅ\n"
+        )
+    if stream_urls.urls or stream_urls.stats["resolved"]:
+        cache = stream_urls.stats
+        text += (
+            f"<b>» sᴛʀᴇᴀᴍ ᴜʀʟs:</b> {len(stream_urls.urls)} ᴄᴀᴄʜᴇᴅ, {cache['hits']} ʜɪᴛs, "
+            f"{cache['resolved']} ʀᴇsᴏʟᴠᴇᴅ, {cache['refreshed']} ʀᴇꜰʀᴇsʜᴇᴅ, {cache['joined']} ᴊᴏɪɴᴇᴅ\n"
+        )
+    gaps = Anony.gaps
+    if gaps:
+        text += (
+            f"<b>» ɢᴀᴘ ʙᴇᴛᴡᴇᴇɴ ᴛʀᴀᴄᴋs:</b> {round(sum(gaps) / len(gaps), 2)}s ᴀᴠɢ / "
+            f"{round(max(gaps), 2)}s ᴍᴀx\n"
+        )
+
     # If no active chats
     if active_audio_count == 0 and active_video_count == 0:
         await mystic.edit_text(f"» ɴᴏ ᴀᴄᴛɪᴠᴇ ᴄʜᴀᴛs ᴏɴ {app.mention}.")
@@ -8,9 +8,9 @@ from pyrogram.types import CallbackQuery, Message
 from AnonXMusic import app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import db
-from AnonXMusic.utils.database import get_assistant, get_authuser_names, get_cmode
+from AnonXMusic.utils.database import get_assistant, get_authuser_ids, get_cmode
 from AnonXMusic.utils.decorators import ActualAdminCB, AdminActual, language
-from AnonXMusic.utils.formatters import alpha_to_int, get_readable_time
+from AnonXMusic.utils.formatters import get_readable_time
 from config import BANNED_USERS, adminlist, lyrical
 
 rel = {}
@@ -35,10 +35,7 @@ async def reload_admin_cache(client, message: Message, _):
         ):
             if user.privileges.can_manage_video_chats:
                 adminlist[message.chat.id].append(user.user.id)
-        authusers = await get_authuser_names(message.chat.id)
-        for user in authusers:
-            user_id = await alpha_to_int(user)
-            adminlist[message.chat.id].append(user_id)
+        adminlist[message.chat.id].extend(await get_authuser_ids(message.chat.id))
         now = int(time.time()) + 180
         rel[message.chat.id] = now
         await message.reply_text(_["reload_2"])
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get when a key is absent or expired, so that None,
+# False and 0 can be cached like any other value.
+MISS = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 100000, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.peek(key) is not MISS
+
+    def _expired(self, entry) -> bool:
+        return entry[0] and entry[0] < time.monotonic()
+
+    def get(self, key, default=MISS):
+        entry = self._data.get(key)
+        if entry is None or self._expired(entry):
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, key, default=MISS):
+        entry = self._data.get(key)
+        if entry is None or self._expired(entry):
+            return default
+        return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl if ttl else 0, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
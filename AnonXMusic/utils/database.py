@@ -1,10 +1,23 @@
-import random
-from typing import Dict, List, Union
+from typing import List, Union
 
-from AnonXMusic import userbot
+import asyncio
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+import config
+from AnonXMusic import LOGGER, userbot
+from AnonXMusic.core.balancer import balancer
 from AnonXMusic.core.mongo import mongodb
+from AnonXMusic.core.session import sessions
+from AnonXMusic.core.storage import MongoStorage, SQLiteStorage
+from AnonXMusic.core.writebehind import writer
+from AnonXMusic.misc import SUDOERS
+from AnonXMusic.utils.cache import MISS, TTLCache
+from config import BANNED_USERS
 
 authdb = mongodb.adminauth
+authlistdb = mongodb.authlist
 authuserdb = mongodb.authuser
 autoenddb = mongodb.autoend
 assdb = mongodb.assistants
@@ -18,182 +31,235 @@ langdb = mongodb.language
 onoffdb = mongodb.onoffper
 playmodedb = mongodb.playmode
 playtypedb = mongodb.playtypedb
+settingsdb = mongodb.chat_settings
+migrationsdb = mongodb.migrations
 skipdb = mongodb.skipmode
 sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
 
+if config.DB_BACKEND == "sqlite":
+    storage = SQLiteStorage(config.SQLITE_PATH)
+else:
+    storage = MongoStorage(mongodb, writer)
+
 # Shifting to memory [mongo sucks often]
-active = []
-activevideo = []
-assistantdict = {}
-autoend = {}
-count = {}
-channelconnect = {}
-langm = {}
-loop = {}
+chatsettings = TTLCache(config.SETTINGS_CACHE_SIZE, config.SETTINGS_CACHE_TTL)
 maintenance = []
-nonadmin = {}
-pause = {}
-playmode = {}
-playtype = {}
-skipmode = {}
+served_counts = TTLCache(ttl=60)
+authusers = TTLCache(config.SETTINGS_CACHE_SIZE, config.SETTINGS_CACHE_TTL)
+
+# Membership index, filled once by load_membership() and kept in sync by the
+# writers below. Until it is ready lookups fall back to mongo.
+blacklisted = set()
+served_chats = set()
+served_users = set()
+membership_ready = asyncio.Event()
+
+# Mirrors of the gban and block lists, both feed the BANNED_USERS filter.
+blocked = set()
+gbanned = set()
+
+
+class ChatSettings:
+    __slots__ = (
+        "lang",
+        "playmode",
+        "playtype",
+        "skipmode",
+        "cmode",
+        "upvotes",
+        "nonadmin",
+        "assistant",
+        "quality",
+    )
+
+    def __init__(self, doc: dict = None):
+        doc = doc or {}
+        self.lang = doc.get("lang", "en")
+        self.playmode = doc.get("playmode", "Direct")
+        self.playtype = doc.get("playtype", "Everyone")
+        self.skipmode = doc.get("skipmode", True)
+        self.cmode = doc.get("cmode")
+        self.upvotes = doc.get("upvotes", 5)
+        self.nonadmin = doc.get("nonadmin", False)
+        self.assistant = doc.get("assistant")
+        self.quality = doc.get("quality", "auto")
+
+
+async def get_chat_settings(chat_id: int) -> ChatSettings:
+    settings = chatsettings.get(chat_id)
+    if settings is MISS:
+        doc = await storage.get("chat_settings", chat_id)
+        settings = ChatSettings(doc)
+        chatsettings.set(chat_id, settings)
+    return settings
+
+
+async def _set_chat_settings(chat_id: int, **fields):
+    settings = chatsettings.peek(chat_id)
+    if settings is not MISS:
+        for key, value in fields.items():
+            setattr(settings, key, value)
+    await storage.set("chat_settings", chat_id, fields)
+
+
+async def load_chat_settings(chat_ids: list, batch_size: int = 1000) -> int:
+    loaded = 0
+    for i in range(0, len(chat_ids), batch_size):
+        batch = chat_ids[i : i + batch_size]
+        docs = await storage.get_many("chat_settings", batch)
+        for chat_id in batch:
+            if chat_id in chatsettings:
+                continue
+            chatsettings.set(chat_id, ChatSettings(docs.get(chat_id)))
+            loaded += 1
+    return loaded
+
+
+def _apply_settings_change(change: dict):
+    chat_id = change["documentKey"]["_id"]
+    pending = writer.get_pending(settingsdb, {"_id": chat_id})
+    pending = pending[1] if pending else {}
+    settings = chatsettings.peek(chat_id)
+    if change["operationType"] == "update" and settings is not MISS:
+        fields = change["updateDescription"]["updatedFields"]
+        for key, value in fields.items():
+            if key in ChatSettings.__slots__ and key not in pending:
+                setattr(settings, key, value)
+    elif not pending:
+        chatsettings.pop(chat_id)
+
+
+async def watch_chat_settings():
+    # Keeps several bot instances that share one database coherent. Change
+    # streams need a replica set, standalone servers just keep using the TTL.
+    if storage.name != "mongo":
+        return
+    while True:
+        try:
+            async with settingsdb.watch() as stream:
+                async for change in stream:
+                    _apply_settings_change(change)
+        except OperationFailure as e:
+            LOGGER(__name__).warning(f"Settings change stream unavailable: {e}")
+            return
+        except PyMongoError as e:
+            LOGGER(__name__).warning(f"Settings change stream dropped: {e}")
+            # Changes may have been missed while disconnected.
+            chatsettings.clear()
+            await asyncio.sleep(5)
+
+
+async def migrate_chat_settings() -> int:
+    if storage.name != "mongo":
+        return 0
+    if await migrationsdb.find_one({"_id": "chat_settings"}):
+        return 0
+    docs = {}
+    async for doc in langdb.find({}, {"chat_id": 1, "lang": 1}):
+        docs.setdefault(doc["chat_id"], {})["lang"] = doc["lang"]
+    async for doc in playmodedb.find({}, {"chat_id": 1, "mode": 1}):
+        docs.setdefault(doc["chat_id"], {})["playmode"] = doc["mode"]
+    async for doc in playtypedb.find({}, {"chat_id": 1, "mode": 1}):
+        docs.setdefault(doc["chat_id"], {})["playtype"] = doc["mode"]
+    async for doc in skipdb.find({}, {"chat_id": 1}):
+        docs.setdefault(doc["chat_id"], {})["skipmode"] = False
+    async for doc in channeldb.find({}, {"chat_id": 1, "mode": 1}):
+        docs.setdefault(doc["chat_id"], {})["cmode"] = doc["mode"]
+    async for doc in countdb.find({}, {"chat_id": 1, "mode": 1}):
+        docs.setdefault(doc["chat_id"], {})["upvotes"] = doc["mode"]
+    async for doc in authdb.find({}, {"chat_id": 1}):
+        docs.setdefault(doc["chat_id"], {})["nonadmin"] = True
+    async for doc in assdb.find({}, {"chat_id": 1, "assistant": 1}):
+        docs.setdefault(doc["chat_id"], {})["assistant"] = doc["assistant"]
+    requests = [
+        UpdateOne({"_id": chat_id}, {"$set": fields}, upsert=True)
+        for chat_id, fields in docs.items()
+    ]
+    for i in range(0, len(requests), 1000):
+        await settingsdb.bulk_write(requests[i : i + 1000], ordered=False)
+    await migrationsdb.update_one(
+        {"_id": "chat_settings"}, {"$set": {"chats": len(docs)}}, upsert=True
+    )
+    return len(docs)
 
 
 async def get_assistant_number(chat_id: int) -> str:
-    assistant = assistantdict.get(chat_id)
-    return assistant
+    settings = await get_chat_settings(chat_id)
+    return settings.assistant
 
 
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.get(assistant)
 
 
 async def set_assistant_new(chat_id, number):
     number = int(number)
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": number}},
-        upsert=True,
-    )
+    await _set_chat_settings(chat_id, assistant=number)
 
 
 async def set_assistant(chat_id):
     from AnonXMusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    ran_assistant = balancer.pick(assistants, chat_id)
+    await _set_chat_settings(chat_id, assistant=ran_assistant)
     userbot = await get_client(ran_assistant)
     return userbot
 
 
-async def get_assistant(chat_id: int) -> str:
+async def get_assistant(chat_id: int, rebalance: bool = False) -> str:
     from AnonXMusic.core.userbot import assistants
 
-    assistant = assistantdict.get(chat_id)
-    if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            userbot = await set_assistant(chat_id)
-            return userbot
-        else:
-            got_assis = dbassistant["assistant"]
-            if got_assis in assistants:
-                assistantdict[chat_id] = got_assis
-                userbot = await get_client(got_assis)
-                return userbot
-            else:
-                userbot = await set_assistant(chat_id)
-                return userbot
-    else:
-        if assistant in assistants:
+    assistant = (await get_chat_settings(chat_id)).assistant
+    if assistant in assistants:
+        if not (
+            rebalance
+            and not await is_active_chat(chat_id)
+            and balancer.should_move(assistant, assistants)
+        ):
             userbot = await get_client(assistant)
             return userbot
-        else:
-            userbot = await set_assistant(chat_id)
-            return userbot
+    userbot = await set_assistant(chat_id)
+    return userbot
 
 
 async def set_calls_assistant(chat_id):
     from AnonXMusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    ran_assistant = balancer.pick(assistants, chat_id)
+    await _set_chat_settings(chat_id, assistant=ran_assistant)
     return ran_assistant
 
 
 async def group_assistant(self, chat_id: int) -> int:
     from AnonXMusic.core.userbot import assistants
 
-    assistant = assistantdict.get(chat_id)
-    if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            assis = await set_calls_assistant(chat_id)
-        else:
-            assis = dbassistant["assistant"]
-            if assis in assistants:
-                assistantdict[chat_id] = assis
-                assis = assis
-            else:
-                assis = await set_calls_assistant(chat_id)
-    else:
-        if assistant in assistants:
-            assis = assistant
-        else:
-            assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    assis = (await get_chat_settings(chat_id)).assistant
+    if assis not in assistants:
+        assis = await set_calls_assistant(chat_id)
+    return self.get(assis)
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.skipmode
 
 
 async def skip_on(chat_id: int):
-    skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    await _set_chat_settings(chat_id, skipmode=True)
 
 
 async def skip_off(chat_id: int):
-    skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    await _set_chat_settings(chat_id, skipmode=False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.upvotes
 
 
 async def set_upvotes(chat_id: int, mode: int):
-    count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_settings(chat_id, upvotes=mode)
 
 
 async def is_autoend() -> bool:
@@ -215,179 +281,130 @@ async def autoend_off():
 
 
 async def get_loop(chat_id: int) -> int:
-    lop = loop.get(chat_id)
-    if not lop:
+    session = sessions.get(chat_id)
+    if session is None:
         return 0
-    return lop
+    return session.loop
 
 
 async def set_loop(chat_id: int, mode: int):
-    loop[chat_id] = mode
+    session = sessions.get(chat_id)
+    if session is not None:
+        session.loop = mode
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.cmode
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_settings(chat_id, cmode=mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.playtype
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_settings(chat_id, playtype=mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.playmode
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_chat_settings(chat_id, playmode=mode)
+
+
+async def get_quality(chat_id: int) -> str:
+    settings = await get_chat_settings(chat_id)
+    return settings.quality
+
+
+async def set_quality(chat_id: int, mode: str):
+    await _set_chat_settings(chat_id, quality=mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.lang
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    await _set_chat_settings(chat_id, lang=lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
-    mode = pause.get(chat_id)
-    if not mode:
+    session = sessions.get(chat_id)
+    if session is None:
         return False
-    return mode
+    return session.playing
 
 
 async def music_on(chat_id: int):
-    pause[chat_id] = True
+    session = sessions.get(chat_id)
+    if session is not None:
+        session.playing = True
 
 
 async def music_off(chat_id: int):
-    pause[chat_id] = False
+    session = sessions.get(chat_id)
+    if session is not None:
+        session.playing = False
 
 
 async def get_active_chats() -> list:
-    return active
+    return list(sessions.active)
 
 
 async def is_active_chat(chat_id: int) -> bool:
-    if chat_id not in active:
-        return False
-    else:
-        return True
+    return chat_id in sessions.active
 
 
 async def add_active_chat(chat_id: int):
-    if chat_id not in active:
-        active.append(chat_id)
+    sessions.activate(chat_id)
 
 
 async def remove_active_chat(chat_id: int):
-    if chat_id in active:
-        active.remove(chat_id)
+    sessions.deactivate(chat_id)
 
 
 async def get_active_video_chats() -> list:
-    return activevideo
+    return list(sessions.video)
 
 
 async def is_active_video_chat(chat_id: int) -> bool:
-    if chat_id not in activevideo:
-        return False
-    else:
-        return True
+    return chat_id in sessions.video
 
 
 async def add_active_video_chat(chat_id: int):
-    if chat_id not in activevideo:
-        activevideo.append(chat_id)
+    sessions.activate_video(chat_id)
 
 
 async def remove_active_video_chat(chat_id: int):
-    if chat_id in activevideo:
-        activevideo.remove(chat_id)
+    sessions.deactivate_video(chat_id)
 
 
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    settings = await get_chat_settings(chat_id)
+    return settings.nonadmin
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    settings = await get_chat_settings(chat_id)
+    return settings.nonadmin
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    await _set_chat_settings(chat_id, nonadmin=True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    await _set_chat_settings(chat_id, nonadmin=False)
 
 
 async def is_on_off(on_off: int) -> bool:
@@ -447,197 +464,300 @@ async def maintenance_on():
     return await onoffdb.insert_one({"on_off": 1})
 
 
+async def load_membership():
+    async for user_id in iter_served_users(5000):
+        served_users.add(user_id)
+    async for chat_id in iter_served_chats(5000):
+        served_chats.add(chat_id)
+    async for chat in blacklist_chatdb.find({}, {"_id": 0, "chat_id": 1}):
+        blacklisted.add(chat["chat_id"])
+    membership_ready.set()
+
+
 async def is_served_user(user_id: int) -> bool:
+    if membership_ready.is_set():
+        return user_id in served_users
     user = await usersdb.find_one({"_id": user_id})
     return bool(user)
 
 
 async def get_served_users() -> list:
     users_list = []
-    async for user in usersdb.find({"_id": {"$gt": 0}}):
-        users_list.append(user["_id"])
+    async for user_id in iter_served_users():
+        users_list.append(user_id)
     return users_list
 
 
+async def _iter_ids(collection, bounds: dict, batch_size: int):
+    # Pages through the _id index instead of holding one cursor open, so slow
+    # consumers such as broadcasts never hit a cursor timeout.
+    while True:
+        batch = (
+            await collection.find({"_id": bounds}, {"_id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        for doc in batch:
+            yield doc["_id"]
+        if len(batch) < batch_size:
+            return
+        bounds = dict(bounds, **{"$gt": batch[-1]["_id"]})
+
+
+async def iter_served_users(batch_size: int = 1000):
+    async for user_id in _iter_ids(usersdb, {"$gt": 0}, batch_size):
+        yield user_id
+
+
+async def _served_count(collection, filter: dict, exact: bool) -> int:
+    key = (collection.name, exact)
+    count = served_counts.get(key)
+    if count is MISS:
+        if exact:
+            count = await collection.count_documents(filter)
+        else:
+            count = await collection.estimated_document_count()
+        served_counts.set(key, count)
+    return count
+
+
+async def get_served_users_count(exact: bool = False) -> int:
+    if membership_ready.is_set():
+        return len(served_users)
+    return await _served_count(usersdb, {"_id": {"$gt": 0}}, exact)
+
+
 async def add_served_user(user_id: int):
-    is_served = await is_served_user(user_id)
-    if is_served:
+    if user_id in served_users:
         return
-    return await usersdb.insert_one({"_id": user_id})
+    served_users.add(user_id)
+    return await usersdb.update_one(
+        {"_id": user_id}, {"$setOnInsert": {"_id": user_id}}, upsert=True
+    )
 
 
 # CHATS
 
 async def is_served_chat(chat_id: int) -> bool:
+    if membership_ready.is_set():
+        return chat_id in served_chats
     chat = await chatsdb.find_one({"_id": chat_id})
     return bool(chat)
 
 
 async def get_served_chats() -> list:
     chats_list = []
-    async for chat in chatsdb.find({"_id": {"$lt": 0}}):  # assuming chat IDs are negative
-        chats_list.append(chat["_id"])
+    async for chat_id in iter_served_chats():
+        chats_list.append(chat_id)
     return chats_list
 
+
+async def iter_served_chats(batch_size: int = 1000):
+    # assuming chat IDs are negative
+    async for chat_id in _iter_ids(chatsdb, {"$lt": 0}, batch_size):
+        yield chat_id
+
+
+async def get_served_chats_count(exact: bool = False) -> int:
+    if membership_ready.is_set():
+        return len(served_chats)
+    return await _served_count(chatsdb, {"_id": {"$lt": 0}}, exact)
+
+
 async def add_served_chat(chat_id: int):
-    is_served = await is_served_chat(chat_id)
-    if is_served:
+    if chat_id in served_chats:
         return
-    return await chatsdb.insert_one({"_id": chat_id})
+    served_chats.add(chat_id)
+    return await chatsdb.update_one(
+        {"_id": chat_id}, {"$setOnInsert": {"_id": chat_id}}, upsert=True
+    )
 
 
 async def blacklisted_chats() -> list:
+    if membership_ready.is_set():
+        return [chat_id for chat_id in blacklisted if chat_id < 0]
     chats_list = []
     async for chat in blacklist_chatdb.find({"chat_id": {"$lt": 0}}):
         chats_list.append(chat["chat_id"])
     return chats_list
 
 
+async def is_blacklisted_chat(chat_id: int) -> bool:
+    if membership_ready.is_set():
+        return chat_id in blacklisted
+    return bool(await blacklist_chatdb.find_one({"chat_id": chat_id}))
+
+
 async def blacklist_chat(chat_id: int) -> bool:
-    if not await blacklist_chatdb.find_one({"chat_id": chat_id}):
-        await blacklist_chatdb.insert_one({"chat_id": chat_id})
-        return True
-    return False
+    if await is_blacklisted_chat(chat_id):
+        return False
+    blacklisted.add(chat_id)
+    await blacklist_chatdb.update_one(
+        {"chat_id": chat_id}, {"$setOnInsert": {"chat_id": chat_id}}, upsert=True
+    )
+    return True
 
 
 async def whitelist_chat(chat_id: int) -> bool:
-    if await blacklist_chatdb.find_one({"chat_id": chat_id}):
-        await blacklist_chatdb.delete_one({"chat_id": chat_id})
-        return True
-    return False
+    if not await is_blacklisted_chat(chat_id):
+        return False
+    blacklisted.discard(chat_id)
+    await blacklist_chatdb.delete_many({"chat_id": chat_id})
+    return True
 
 
-async def _get_authusers(chat_id: int) -> Dict[str, int]:
-    _notes = await authuserdb.find_one({"chat_id": chat_id})
-    if not _notes:
-        return {}
-    return _notes["notes"]
+async def migrate_authusers() -> int:
+    if await migrationsdb.find_one({"_id": "authlist"}):
+        return 0
+    requests = []
+    async for doc in authuserdb.find({}):
+        for note in (doc.get("notes") or {}).values():
+            requests.append(
+                UpdateOne(
+                    {"chat_id": doc["chat_id"], "auth_user_id": note["auth_user_id"]},
+                    {"$setOnInsert": note},
+                    upsert=True,
+                )
+            )
+    for i in range(0, len(requests), 1000):
+        await authlistdb.bulk_write(requests[i : i + 1000], ordered=False)
+    await migrationsdb.update_one(
+        {"_id": "authlist"}, {"$set": {"users": len(requests)}}, upsert=True
+    )
+    return len(requests)
 
 
-async def get_authuser_names(chat_id: int) -> List[str]:
-    _notes = []
-    for note in await _get_authusers(chat_id):
-        _notes.append(note)
-    return _notes
+async def get_authuser_ids(chat_id: int) -> set:
+    user_ids = authusers.get(chat_id)
+    if user_ids is MISS:
+        user_ids = set()
+        async for doc in authlistdb.find(
+            {"chat_id": chat_id}, {"_id": 0, "auth_user_id": 1}
+        ):
+            user_ids.add(doc["auth_user_id"])
+        authusers.set(chat_id, user_ids)
+    return user_ids
 
 
-async def get_authuser(chat_id: int, name: str) -> Union[bool, dict]:
-    name = name
-    _notes = await _get_authusers(chat_id)
-    if name in _notes:
-        return _notes[name]
-    else:
-        return False
+async def is_authuser(chat_id: int, user_id: int) -> bool:
+    return user_id in await get_authuser_ids(chat_id)
 
 
-async def save_authuser(chat_id: int, name: str, note: dict):
-    name = name
-    _notes = await _get_authusers(chat_id)
-    _notes[name] = note
+async def get_authusers(chat_id: int) -> List[dict]:
+    return await authlistdb.find(
+        {"chat_id": chat_id}, {"_id": 0, "chat_id": 0}
+    ).to_list(length=None)
 
-    await authuserdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"notes": _notes}}, upsert=True
+
+async def get_authuser(chat_id: int, user_id: int) -> Union[bool, dict]:
+    note = await authlistdb.find_one(
+        {"chat_id": chat_id, "auth_user_id": user_id}, {"_id": 0, "chat_id": 0}
     )
+    if not note:
+        return False
+    return note
 
 
-async def delete_authuser(chat_id: int, name: str) -> bool:
-    notesd = await _get_authusers(chat_id)
-    name = name
-    if name in notesd:
-        del notesd[name]
-        await authuserdb.update_one(
-            {"chat_id": chat_id},
-            {"$set": {"notes": notesd}},
-            upsert=True,
-        )
-        return True
-    return False
+async def save_authuser(chat_id: int, note: dict) -> bool:
+    try:
+        await authlistdb.insert_one(dict(note, chat_id=chat_id))
+    except DuplicateKeyError:
+        return False
+    user_ids = authusers.peek(chat_id)
+    if user_ids is not MISS:
+        user_ids.add(note["auth_user_id"])
+    return True
+
+
+async def delete_authuser(chat_id: int, user_id: int) -> bool:
+    result = await authlistdb.delete_one({"chat_id": chat_id, "auth_user_id": user_id})
+    user_ids = authusers.peek(chat_id)
+    if user_ids is not MISS:
+        user_ids.discard(user_id)
+    return bool(result.deleted_count)
+
+
+async def load_banned_users():
+    async for user in gbansdb.find({}, {"_id": 0, "user_id": 1}):
+        gbanned.add(user["user_id"])
+    async for user in blockeddb.find({}, {"_id": 0, "user_id": 1}):
+        blocked.add(user["user_id"])
+    BANNED_USERS.update(gbanned)
+    BANNED_USERS.update(blocked)
 
 
 async def get_gbanned() -> list:
-    results = []
-    async for user in gbansdb.find({"user_id": {"$gt": 0}}):
-        user_id = user["user_id"]
-        results.append(user_id)
-    return results
+    return list(gbanned)
 
 
 async def is_gbanned_user(user_id: int) -> bool:
-    user = await gbansdb.find_one({"user_id": user_id})
-    if not user:
-        return False
-    return True
+    return user_id in gbanned
 
 
 async def add_gban_user(user_id: int):
-    is_gbanned = await is_gbanned_user(user_id)
-    if is_gbanned:
+    if user_id in gbanned:
         return
-    return await gbansdb.insert_one({"user_id": user_id})
+    gbanned.add(user_id)
+    BANNED_USERS.add(user_id)
+    return await gbansdb.update_one(
+        {"user_id": user_id}, {"$setOnInsert": {"user_id": user_id}}, upsert=True
+    )
 
 
 async def remove_gban_user(user_id: int):
-    is_gbanned = await is_gbanned_user(user_id)
-    if not is_gbanned:
+    if user_id not in gbanned:
         return
-    return await gbansdb.delete_one({"user_id": user_id})
+    gbanned.discard(user_id)
+    if user_id not in blocked:
+        BANNED_USERS.discard(user_id)
+    return await gbansdb.delete_many({"user_id": user_id})
 
 
 async def get_sudoers() -> list:
-    sudoers = await sudoersdb.find_one({"sudo": "sudo"})
-    if not sudoers:
-        return []
-    return sudoers["sudoers"]
+    return list(SUDOERS)
 
 
 async def add_sudo(user_id: int) -> bool:
-    sudoers = await get_sudoers()
-    sudoers.append(user_id)
     await sudoersdb.update_one(
-        {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
+        {"sudo": "sudo"}, {"$addToSet": {"sudoers": user_id}}, upsert=True
     )
+    SUDOERS.add(user_id)
     return True
 
 
 async def remove_sudo(user_id: int) -> bool:
-    sudoers = await get_sudoers()
-    sudoers.remove(user_id)
-    await sudoersdb.update_one(
-        {"sudo": "sudo"}, {"$set": {"sudoers": sudoers}}, upsert=True
-    )
+    await sudoersdb.update_one({"sudo": "sudo"}, {"$pull": {"sudoers": user_id}})
+    SUDOERS.discard(user_id)
     return True
 
 
 async def get_banned_users() -> list:
-    results = []
-    async for user in blockeddb.find({"user_id": {"$gt": 0}}):
-        user_id = user["user_id"]
-        results.append(user_id)
-    return results
+    return list(blocked)
 
 
 async def get_banned_count() -> int:
-    users = blockeddb.find({"user_id": {"$gt": 0}})
-    users = await users.to_list(length=100000)
-    return len(users)
+    return len(blocked)
 
 
 async def is_banned_user(user_id: int) -> bool:
-    user = await blockeddb.find_one({"user_id": user_id})
-    if not user:
-        return False
-    return True
+    return user_id in blocked
 
 
 async def add_banned_user(user_id: int):
-    is_gbanned = await is_banned_user(user_id)
-    if is_gbanned:
+    if user_id in blocked:
         return
-    return await blockeddb.insert_one({"user_id": user_id})
+    blocked.add(user_id)
+    BANNED_USERS.add(user_id)
+    return await blockeddb.update_one(
+        {"user_id": user_id}, {"$setOnInsert": {"user_id": user_id}}, upsert=True
+    )
 
 
 async def remove_banned_user(user_id: int):
-    is_gbanned = await is_banned_user(user_id)
-    if not is_gbanned:
+    if user_id not in blocked:
         return
-    return await blockeddb.delete_one({"user_id": user_id})
+    blocked.discard(user_id)
+    if user_id not in gbanned:
+        BANNED_USERS.discard(user_id)
+    return await blockeddb.delete_many({"user_id": user_id})
@@ -4,7 +4,7 @@ from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from AnonXMusic import app
 from AnonXMusic.misc import SUDOERS, db
 from AnonXMusic.utils.database import (
-    get_authuser_names,
+    is_authuser,
     get_cmode,
     get_lang,
     get_upvote_count,
@@ -16,8 +16,6 @@ from AnonXMusic.utils.database import (
 from config import SUPPORT_CHAT, adminlist, confirmer
 from strings import get_string
 
-from ..formatters import int_to_alpha
-
 
 def AdminRightsCheck(mystic):
     async def wrapper(client, message):
@@ -188,9 +186,9 @@ def ActualAdminCB(mystic):
                 return await CallbackQuery.answer(_["general_4"], show_alert=True)
             if not a.can_manage_video_chats:
                 if CallbackQuery.from_user.id not in SUDOERS:
-                    token = await int_to_alpha(CallbackQuery.from_user.id)
-                    _check = await get_authuser_names(CallbackQuery.from_user.id)
-                    if token not in _check:
+                    if not await is_authuser(
+                        CallbackQuery.message.chat.id, CallbackQuery.from_user.id
+                    ):
                         try:
                             return await CallbackQuery.answer(
                                 _["general_4"],
@@ -3,6 +3,7 @@ import asyncio
 from pyrogram.enums import ChatMemberStatus
 from pyrogram.errors import (
     ChatAdminRequired,
+    FloodWait,
     InviteRequestSent,
     UserAlreadyParticipant,
     UserNotParticipant,
@@ -10,9 +11,11 @@ from pyrogram.errors import (
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from AnonXMusic import YouTube, app
+from AnonXMusic.core.balancer import balancer
 from AnonXMusic.misc import SUDOERS
 from AnonXMusic.utils.database import (
     get_assistant,
+    get_assistant_number,
     get_cmode,
     get_lang,
     get_playmode,
@@ -27,6 +30,35 @@ from strings import get_string
 links = {}
 
 
+async def get_invitelink(chat_id: int, username: str = None) -> str:
+    if chat_id in links:
+        return links[chat_id]
+    if username:
+        invitelink = username
+    else:
+        invitelink = await app.export_chat_invite_link(chat_id)
+    if invitelink.startswith("https://t.me/+"):
+        invitelink = invitelink.replace("https://t.me/+", "https://t.me/joinchat/")
+    return invitelink
+
+
+async def join_assistant(chat_id: int, userbot, invitelink: str):
+    # Brings an assistant into the chat, approving its join request when the
+    # chat requires one.
+    try:
+        await userbot.join_chat(invitelink)
+    except InviteRequestSent:
+        await app.approve_chat_join_request(chat_id, userbot.id)
+        await asyncio.sleep(3)
+    except UserAlreadyParticipant:
+        pass
+    links[chat_id] = invitelink
+    try:
+        await userbot.resolve_peer(chat_id)
+    except:
+        pass
+
+
 def PlayWrapper(command):
     async def wrapper(client, message):
         language = await get_lang(message.chat.id)
@@ -114,7 +146,7 @@ def PlayWrapper(command):
             fplay = None
 
         if not await is_active_chat(chat_id):
-            userbot = await get_assistant(chat_id)
+            userbot = await get_assistant(chat_id, rebalance=True)
             try:
                 try:
                     get = await app.get_chat_member(chat_id, userbot.id)
@@ -130,53 +162,34 @@ def PlayWrapper(command):
                         )
                     )
             except UserNotParticipant:
-                if chat_id in links:
-                    invitelink = links[chat_id]
-                else:
-                    if message.chat.username:
-                        invitelink = message.chat.username
-                        try:
-                            await userbot.resolve_peer(invitelink)
-                        except:
-                            pass
-                    else:
-                        try:
-                            invitelink = await app.export_chat_invite_link(chat_id)
-                        except ChatAdminRequired:
-                            return await message.reply_text(_["call_1"])
-                        except Exception as e:
-                            return await message.reply_text(
-                                _["call_3"].format(app.mention, type(e).__name__)
-                            )
-
-                if invitelink.startswith("https://t.me/+"):
-                    invitelink = invitelink.replace(
-                        "https://t.me/+", "https://t.me/joinchat/"
+                try:
+                    invitelink = await get_invitelink(chat_id, message.chat.username)
+                except ChatAdminRequired:
+                    return await message.reply_text(_["call_1"])
+                except Exception as e:
+                    return await message.reply_text(
+                        _["call_3"].format(app.mention, type(e).__name__)
                     )
+                if message.chat.username:
+                    try:
+                        await userbot.resolve_peer(invitelink)
+                    except:
+                        pass
                 myu = await message.reply_text(_["call_4"].format(app.mention))
                 try:
                     await asyncio.sleep(1)
-                    await userbot.join_chat(invitelink)
-                except InviteRequestSent:
-                    try:
-                        await app.approve_chat_join_request(chat_id, userbot.id)
-                    except Exception as e:
-                        return await message.reply_text(
-                            _["call_3"].format(app.mention, type(e).__name__)
-                        )
-                    await asyncio.sleep(3)
-                    await myu.edit(_["call_5"].format(app.mention))
-                except UserAlreadyParticipant:
-                    pass
+                    await join_assistant(chat_id, userbot, invitelink)
+                except FloodWait as e:
+                    balancer.record_flood(await get_assistant_number(chat_id))
+                    return await message.reply_text(
+                        _["call_3"].format(app.mention, type(e).__name__)
+                    )
                 except Exception as e:
                     return await message.reply_text(
                         _["call_3"].format(app.mention, type(e).__name__)
                     )
-
-                links[chat_id] = invitelink
-
                 try:
-                    await userbot.resolve_peer(chat_id)
+                    await myu.edit(_["call_5"].format(app.mention))
                 except:
                     pass
 
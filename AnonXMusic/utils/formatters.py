@@ -84,14 +84,9 @@ def seconds_to_min(seconds):
 
 
 def speed_converter(seconds, speed):
-    if str(speed) == str("0.5"):
-        seconds = seconds * 2
-    if str(speed) == str("0.75"):
-        seconds = seconds + ((50 * seconds) // 100)
-    if str(speed) == str("1.5"):
-        seconds = seconds - ((25 * seconds) // 100)
-    if str(speed) == str("2.0"):
-        seconds = seconds - ((50 * seconds) // 100)
+    # A point of the original track -> the same point when it plays at speed.
+    if seconds is not None:
+        seconds = int(seconds / float(speed))
     collect = seconds
     if seconds is not None:
         seconds = int(seconds)
@@ -113,7 +108,7 @@ def speed_converter(seconds, speed):
         elif s > 0:
             convert = "00:{:02d}".format(s)
             return convert, collect
-    return "-"
+    return "-", collect
 
 
 def check_duration(file_path):
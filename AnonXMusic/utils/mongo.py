@@ -1,8 +1,5 @@
-from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from AnonXMusic.core.mongo import _mongo_async_ as mongo
 
-from config import MONGO_DB_URI
-
-mongo = MongoCli(MONGO_DB_URI)
 db = mongo.AnonxMusic
 
 coupledb = db.couple
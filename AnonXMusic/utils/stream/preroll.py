@@ -0,0 +1,217 @@
+import asyncio
+import os
+import time
+
+import config
+from AnonXMusic import LOGGER
+from AnonXMusic.core.quality import quality
+from AnonXMusic.core.session import sessions
+from AnonXMusic.core.urlcache import lifetime, stream_urls
+from AnonXMusic.utils.database import get_quality
+from AnonXMusic.utils.stream.rendition import rendition
+from AnonXMusic.utils.stream.source import resolve_source
+from AnonXMusic.utils.stream.transcode import canonical
+from AnonXMusic.utils.thumbnails import get_thumb
+from config import autoclean
+
+log = LOGGER(__name__)
+
+# chat id -> {id(entry): (queue entry being prepared, task)}
+tasks = {}
+# Fetches in flight, each holds one of PREFETCH_CONCURRENCY slots until it is
+# done, even when its task was cancelled: yt-dlp cannot stop halfway.
+busy = set()
+wakeup = asyncio.Event()
+stats = {"prepared": 0, "failed": 0, "cancelled": 0}
+
+# Stream urls that do not say when they expire are refetched when they are
+# older than this by the time the track is about to play.
+URL_MAX_AGE = 1800
+
+
+def kick():
+    # Runs the scheduler now instead of on its next tick.
+    wakeup.set()
+
+
+def take_prepared(entry: dict):
+    # The source prepared for a queue entry, or None when it was never
+    # prepared or is a url about to expire.
+    prepared = entry.pop("prepared", None)
+    if not prepared or _expiring(prepared):
+        return None
+    return prepared[0]
+
+
+async def claim(chat_id: int, entry: dict, timeout: float = 30):
+    # take_prepared for the entry about to play, waiting for a fetch already
+    # in flight instead of downloading the track a second time.
+    current = tasks.get(chat_id, {}).get(id(entry))
+    if current and current[0] is entry:
+        try:
+            await asyncio.wait_for(asyncio.shield(current[1]), timeout)
+        except Exception:
+            pass
+    return take_prepared(entry)
+
+
+def _expiring(prepared) -> bool:
+    link, ready_at = prepared
+    if os.path.isfile(link):
+        return False
+    left = lifetime(link)
+    if left is None:
+        return time.monotonic() - ready_at > URL_MAX_AGE
+    return left < stream_urls.margin
+
+
+def _remaining(session):
+    # Seconds left of the current track, None when its length is unknown.
+    head = session.queue[0]
+    seconds = int(head.get("seconds") or 0)
+    if not seconds:
+        return None
+    return seconds - int(head.get("played") or 0)
+
+
+def _depth() -> int:
+    return max(config.PREFETCH_DEPTH, 1)
+
+
+def _wanted(entry: dict, position: int, remaining) -> bool:
+    file = entry["file"]
+    if "index_" in file:
+        return False
+    # Live stream urls are short lived, those are fetched in the last seconds.
+    lead = 15 if "live_" in file else config.PREROLL_SECONDS
+    due = position == 1 and lead and (remaining is None or remaining <= lead)
+    if "prepared" in entry:
+        prepared = entry["prepared"]
+        if not (due and prepared and _expiring(prepared)):
+            return False
+        del entry["prepared"]
+    if "live_" in file:
+        return bool(due)
+    return bool(due) or position <= config.PREFETCH_DEPTH
+
+
+def _done(fetch):
+    busy.discard(fetch)
+    if not fetch.cancelled():
+        fetch.exception()
+    kick()
+
+
+async def _prepare(chat_id: int, entry: dict, fetch):
+    started = time.monotonic()
+    try:
+        link = await asyncio.shield(fetch)
+        if link:
+            entry["prepared"] = (link, time.monotonic())
+            if "vid_" in entry["file"] and os.path.isfile(link):
+                # Downloaded for good, play and clean it up like any file.
+                try:
+                    autoclean.remove(entry["file"])
+                except ValueError:
+                    pass
+                autoclean.append(link)
+                entry["file"] = link
+            # The wav copy or rendition is made in the background, the track
+            # need not wait for it.
+            if str(entry["streamtype"]) != "video":
+                canonical(link)
+            else:
+                rendition(link, quality.tier(await get_quality(chat_id)))
+        if entry["vidid"] not in ("telegram", "soundcloud"):
+            entry["thumb"] = await get_thumb(entry["vidid"])
+        stats["prepared"] += 1
+        log.info(
+            f"Prefetched {entry['vidid']} in {chat_id} in {round(time.monotonic() - started, 2)}s."
+        )
+    except asyncio.CancelledError:
+        stats["cancelled"] += 1
+        raise
+    except Exception as e:
+        stats["failed"] += 1
+        log.warning(f"Prefetch failed in {chat_id}: {e}")
+    finally:
+        chat = tasks.get(chat_id, {})
+        if chat.get(id(entry), (None,))[0] is entry:
+            del chat[id(entry)]
+    # Handled either way, change_stream fetches the track the usual way when
+    # nothing was prepared.
+    entry.setdefault("prepared", None)
+
+
+def _start(chat_id: int, entry: dict):
+    video = str(entry["streamtype"]) == "video"
+    fetch = asyncio.ensure_future(resolve_source(entry, video))
+    busy.add(fetch)
+    fetch.add_done_callback(_done)
+    task = asyncio.create_task(_prepare(chat_id, entry, fetch))
+    tasks.setdefault(chat_id, {})[id(entry)] = (entry, task)
+
+
+def _sweep():
+    # Drops work for entries that left the prefetch window: skipped,
+    # removed, or the chat ended. The head stays, change_stream claims it.
+    for chat_id, chat in list(tasks.items()):
+        session = sessions.get(chat_id)
+        keep = set()
+        if session is not None and session.active:
+            keep = {id(entry) for entry in session.queue[: _depth() + 1]}
+        for key, (entry, task) in list(chat.items()):
+            if key not in keep:
+                task.cancel()
+                del chat[key]
+        if not chat:
+            del tasks[chat_id]
+
+
+def _candidates() -> list:
+    found = []
+    for session in sessions:
+        if not session.active or not session.queue:
+            continue
+        remaining = _remaining(session)
+        started = tasks.get(session.chat_id, {})
+        for position, entry in enumerate(session.queue[1 : _depth() + 1], 1):
+            if id(entry) in started or not _wanted(entry, position, remaining):
+                continue
+            found.append(((position, remaining or 0), session.chat_id, entry))
+    # Closest to the head first, then the chats whose track ends soonest.
+    found.sort(key=lambda candidate: candidate[0])
+    return found
+
+
+def _refresh():
+    # Keeps the stream urls of the tracks playing or about to play fresh, so
+    # skips, loops and seeks to them reuse the cached url.
+    ids = set()
+    for session in sessions:
+        if session.active:
+            ids.update(entry["vidid"] for entry in session.queue[: _depth() + 1])
+    if ids:
+        stream_urls.refresh(ids)
+
+
+def schedule():
+    _sweep()
+    _refresh()
+    for _, chat_id, entry in _candidates():
+        if len(busy) >= config.PREFETCH_CONCURRENCY:
+            break
+        _start(chat_id, entry)
+
+
+async def preroll_loop(interval: float = 2):
+    while True:
+        try:
+            await asyncio.wait_for(wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+        try:
+            schedule()
+        except Exception as e:
+            log.warning(f"Prefetch scheduling failed: {e}")
@@ -0,0 +1,77 @@
+import asyncio
+
+from AnonXMusic import LOGGER
+from AnonXMusic.core.call import Anony
+from AnonXMusic.core.session import sessions
+from AnonXMusic.core.snapshot import snapshots
+from AnonXMusic.misc import db
+from AnonXMusic.utils.database import group_assistant
+from AnonXMusic.utils.exceptions import AssistantErr
+from AnonXMusic.utils.stream.source import playback_speed, resolve_source
+from config import autoclean
+
+log = LOGGER(__name__)
+
+
+async def _resume(state: dict) -> bool:
+    chat_id = state["chat_id"]
+    queue = state.get("queue")
+    if not queue:
+        return False
+    entry = queue[0]
+    video = str(entry["streamtype"]) == "video"
+    try:
+        link = await resolve_source(entry, video)
+    except Exception as e:
+        log.warning(f"Could not fetch the current track of {chat_id}: {e}")
+        link = None
+    if not link:
+        return False
+    position = 0 if "live_" in entry["file"] else int(entry.get("played", 0))
+    entry["played"] = position
+    db[chat_id] = queue
+    sessions.get(chat_id).loop = state.get("loop", 0)
+    autoclean.extend(item["file"] for item in queue)
+    for attempt in range(2):
+        try:
+            await Anony.join_call(
+                chat_id,
+                entry["chat_id"],
+                link,
+                video=video,
+                position=position,
+                speed=playback_speed(entry),
+            )
+            return True
+        except AssistantErr as e:
+            error = e
+            # After a crash the assistant can still be listed in the call.
+            try:
+                assistant = await group_assistant(Anony, chat_id)
+                await assistant.leave_group_call(chat_id)
+            except:
+                pass
+        except Exception as e:
+            error = e
+            break
+    log.warning(f"Could not resume playback in {chat_id}: {error}")
+    sessions.close(chat_id)
+    return False
+
+
+async def recover_queues(concurrency: int = 3) -> int:
+    states = await snapshots.load()
+    if not states:
+        return 0
+    # States are sorted by queue length and the semaphore wakes waiters in
+    # order, so the longest queues rejoin first.
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resume(state):
+        async with semaphore:
+            return await _resume(state)
+
+    results = await asyncio.gather(*(resume(state) for state in states))
+    resumed = sum(results)
+    log.info(f"Resumed playback in {resumed} of {len(states)} chats.")
+    return resumed
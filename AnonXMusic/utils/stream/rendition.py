@@ -0,0 +1,133 @@
+import asyncio
+import os
+from collections import Counter
+
+from pytgcalls.types.input_stream.video_tools import check_video_params
+
+import config
+from AnonXMusic import LOGGER
+from AnonXMusic.core.filecache import FileCache, queue_refs
+from AnonXMusic.core.quality import PARAMETERS, TIERS
+from AnonXMusic.utils.stream.source import downloaded
+
+log = LOGGER(__name__)
+
+
+def _in_use() -> Counter:
+    refs = Counter()
+    for file, count in queue_refs("file").items():
+        for tier in TIERS:
+            refs[_target(file, tier)] += count
+    return refs
+
+
+renditions = FileCache(
+    os.path.realpath(config.RENDITION_PATH),
+    config.RENDITION_CACHE_SIZE * 1024 * 1024,
+    in_use=_in_use,
+    min_free=config.RENDITION_MIN_FREE * 1024 * 1024,
+)
+# Each build is a full re-encode, RENDITION_WORKERS of them run at a time.
+_slots = asyncio.Semaphore(max(config.RENDITION_WORKERS, 1))
+
+
+def _target(file: str, tier: str) -> str:
+    stem = os.path.splitext(os.path.basename(file))[0]
+    return os.path.join(renditions.root, f"{stem}.{tier}.mkv")
+
+
+async def _run(*args) -> bytes:
+    # Niced so renditions yield to the streams playing.
+    proc = await asyncio.create_subprocess_exec(
+        "nice",
+        "-n",
+        "10",
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode:
+        raise RuntimeError(stderr.decode(errors="ignore")[-300:])
+    return stdout
+
+
+async def _render(file: str, out: str, parameters):
+    # Scales once to the size pytgcalls would scale the source to on every
+    # play, the rendition then plays with HighQualityVideo, which keeps its
+    # size as it is.
+    probe = await _run(
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height",
+        "-of",
+        "csv=p=0:s=x",
+        file,
+    )
+    width, height = (int(x) for x in probe.decode().split()[0].split("x")[:2])
+    width, height = check_video_params(parameters, width, height)
+    await _run(
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        file,
+        "-vf",
+        f"scale={width}:{height}",
+        "-r",
+        str(parameters.frame_rate),
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        "23",
+        "-pix_fmt",
+        "yuv420p",
+        # A keyframe every two seconds keeps seeks cheap.
+        "-g",
+        str(parameters.frame_rate * 2),
+        "-c:a",
+        "copy",
+        "-f",
+        "matroska",
+        out,
+    )
+
+
+async def build(file: str, tier: str) -> str:
+    async def render(out):
+        async with _slots:
+            await _render(file, out, PARAMETERS[tier][1]())
+
+    return await renditions.get(_target(file, tier), render)
+
+
+def eligible(file) -> bool:
+    return config.VIDEO_RENDITIONS and downloaded(file)
+
+
+def _done(future):
+    if not future.cancelled() and future.exception():
+        log.warning(f"Building a video rendition failed: {future.exception()}")
+
+
+def rendition(file, tier: str):
+    # The rendition of a downloaded video for tier when there is one.
+    # Otherwise the file itself, and the rendition is built in the
+    # background for the next play or seek.
+    if not eligible(file):
+        return file
+    target = _target(file, tier)
+    if renditions.lookup(target):
+        return target
+    if target not in renditions.rendering:
+        asyncio.ensure_future(build(file, tier)).add_done_callback(_done)
+    return file
@@ -0,0 +1,48 @@
+import os
+
+from AnonXMusic import YouTube
+
+DOWNLOADS = os.path.realpath("downloads")
+
+
+def downloaded(file) -> bool:
+    # A local file fetched by the bot, named after its video or file id.
+    return (
+        isinstance(file, str)
+        and os.path.realpath(file).startswith(DOWNLOADS + os.sep)
+        and os.path.isfile(file)
+    )
+
+
+def playback_speed(entry: dict) -> float:
+    # Speed the stream filters have to apply, 1.0 once a rendered file plays
+    # at that speed by itself. played is counted at this speed.
+    if entry.get("speed_path"):
+        return 1.0
+    return float(entry.get("speed") or 1.0)
+
+
+async def resolve_source(entry: dict, video: bool):
+    # Something ffmpeg can open for a queue entry, fetching it again when the
+    # local file is gone. None when it cannot be played anymore.
+    file = entry["file"]
+    vidid = entry["vidid"]
+    if "live_" in file:
+        n, link = await YouTube.video(vidid, True)
+        return link if n else None
+    if "index_" in file:
+        return vidid
+    if entry.get("speed_path"):
+        if os.path.isfile(entry["speed_path"]):
+            return entry["speed_path"]
+        # The rendered file is gone, the original plays at the same speed
+        # through filters, see playback_speed.
+        entry["speed_path"] = None
+    if "vid_" not in file and os.path.isfile(file):
+        return file
+    if vidid in ("telegram", "soundcloud"):
+        return None
+    path, _ = await YouTube.download(vidid, None, videoid=True, video=video)
+    if path and "vid_" not in file:
+        entry["file"] = path
+    return path
@@ -12,6 +12,7 @@ from AnonXMusic.utils.database import add_active_video_chat, is_active_chat
 from AnonXMusic.utils.exceptions import AssistantErr
 from AnonXMusic.utils.inline import aq_markup, close_markup, stream_markup
 from AnonXMusic.utils.pastebin import AnonyBin
+from AnonXMusic.utils.stream.preroll import kick
 from AnonXMusic.utils.stream.queue import put_queue, put_queue_index
 from AnonXMusic.utils.thumbnails import get_thumb
 
@@ -137,17 +138,12 @@ async def stream(
         duration_min = result["duration_min"]
         thumbnail = result["thumb"]
         status = True if video else None
-        try:
-            file_path, direct = await YouTube.download(
-                vidid, mystic, videoid=True, video=status
-            )
-        except:
-            raise AssistantErr(_["play_14"])
         if await is_active_chat(chat_id):
+            # Downloaded by the prefetch scheduler once it gets close to playing.
             await put_queue(
                 chat_id,
                 original_chat_id,
-                file_path if direct else f"vid_{vidid}",
+                f"vid_{vidid}",
                 title,
                 duration_min,
                 user_name,
@@ -155,6 +151,7 @@ async def stream(
                 user_id,
                 "video" if video else "audio",
             )
+            kick()
             position = len(db.get(chat_id)) - 1
             button = aq_markup(_, chat_id)
             await app.send_message(
@@ -163,6 +160,12 @@ async def stream(
                 reply_markup=InlineKeyboardMarkup(button),
             )
         else:
+            try:
+                file_path, direct = await YouTube.download(
+                    vidid, mystic, videoid=True, video=status
+                )
+            except:
+                raise AssistantErr(_["play_14"])
             if not forceplay:
                 db[chat_id] = []
             await Anony.join_call(
@@ -0,0 +1,81 @@
+import asyncio
+import os
+from collections import Counter
+
+import config
+from AnonXMusic import LOGGER
+from AnonXMusic.core.filecache import FileCache, queue_refs
+from AnonXMusic.utils.stream.source import downloaded
+
+log = LOGGER(__name__)
+
+# What the pytgcalls audio ffmpeg produces anyway: 48 kHz mono s16le. From a
+# wav of it playback only copies samples and seeking is a plain offset.
+CANONICAL = ["-vn", "-ac", "1", "-ar", "48000", "-c:a", "pcm_s16le", "-f", "wav"]
+
+
+def _in_use() -> Counter:
+    refs = Counter()
+    for file, count in queue_refs("file").items():
+        refs[_target(file)] += count
+    return refs
+
+
+transcoded = FileCache(
+    os.path.realpath(config.TRANSCODE_PATH),
+    config.TRANSCODE_CACHE_SIZE * 1024 * 1024,
+    in_use=_in_use,
+)
+# Transcodes are cheap next to playback, a couple at a time keeps them off
+# the streams' CPU.
+_slots = asyncio.Semaphore(2)
+
+
+def _target(file: str) -> str:
+    # Downloads are named after the video id (or telegram file id), so is
+    # their canonical copy.
+    stem = os.path.splitext(os.path.basename(file))[0]
+    return os.path.join(transcoded.root, f"{stem}.wav")
+
+
+def eligible(file) -> bool:
+    return config.TRANSCODE_AUDIO and downloaded(file)
+
+
+async def transcode(file: str) -> str:
+    async def render(out):
+        async with _slots:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-y",
+                "-i",
+                file,
+                *CANONICAL,
+                out,
+                stdin=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(stderr.decode(errors="ignore")[-300:])
+
+    return await transcoded.get(_target(file), render)
+
+
+def _done(future):
+    if not future.cancelled() and future.exception():
+        log.warning(f"Transcoding failed: {future.exception()}")
+
+
+def canonical(file):
+    # The canonical copy of a downloaded file when there is one. Otherwise
+    # the file itself, and the copy is made in the background for the next
+    # play, seek or loop.
+    if not eligible(file):
+        return file
+    target = _target(file)
+    if transcoded.lookup(target):
+        return target
+    if target not in transcoded.rendering:
+        asyncio.ensure_future(transcode(file)).add_done_callback(_done)
+    return file
@@ -0,0 +1,101 @@
+"""Lookup latency on the bot's hot collections, before and after indexing.
+
+Seeds a throwaway database on a local mongod, times point lookups the way
+utils/database.py issues them, creates the indexes declared in
+AnonXMusic/core/indexes.py and times the same lookups again.
+
+    MONGO_BENCH_URI=mongodb://localhost:27017 python benchmarks/indexes.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+
+URI = os.getenv("MONGO_BENCH_URI", "mongodb://localhost:27017")
+DOCS = int(os.getenv("BENCH_DOCS", 200000))
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", 500))
+
+# collection -> (document factory, lookup filter factory, index keys)
+CASES = {
+    "gban": (
+        lambda i: {"user_id": 1000000 + i},
+        lambda i: {"user_id": 1000000 + i},
+        ["user_id"],
+    ),
+    "blacklistChat": (
+        lambda i: {"chat_id": -1001000000000 - i},
+        lambda i: {"chat_id": -1001000000000 - i},
+        ["chat_id"],
+    ),
+    "authlist": (
+        lambda i: {
+            "chat_id": -1001000000000 - i // 10,
+            "auth_user_id": 1000000 + i,
+            "auth_name": "user",
+        },
+        lambda i: {"chat_id": -1001000000000 - i // 10, "auth_user_id": 1000000 + i},
+        ["chat_id", "auth_user_id"],
+    ),
+    "onoffper": (
+        lambda i: {"on_off": i},
+        lambda i: {"on_off": i},
+        ["on_off"],
+    ),
+}
+
+
+async def seed(collection, factory):
+    batch = []
+    for i in range(DOCS):
+        batch.append(factory(i))
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def measure(collection, lookup) -> list:
+    samples = []
+    for _ in range(LOOKUPS):
+        query = lookup(random.randrange(DOCS))
+        start = time.perf_counter()
+        await collection.find_one(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples: list) -> str:
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    return f"p50 {statistics.median(samples):8.3f} ms  p99 {p99:8.3f} ms"
+
+
+async def main():
+    client = AsyncIOMotorClient(URI)
+    database = client[f"anon_bench_{os.getpid()}"]
+    print(f"{DOCS} documents per collection, {LOOKUPS} lookups per run\n")
+    try:
+        for name, (factory, lookup, keys) in CASES.items():
+            collection = database[name]
+            await seed(collection, factory)
+            before = await measure(collection, lookup)
+            await collection.create_index([(key, ASCENDING) for key in keys])
+            after = await measure(collection, lookup)
+            print(f"{name:<14} scan   {summary(before)}")
+            print(f"{'':<14} index  {summary(after)}")
+            print(
+                f"{'':<14} speedup x{statistics.median(before) / statistics.median(after):.1f}\n"
+            )
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Settings read/write latency of the mongo and sqlite storage backends.
+
+Loads AnonXMusic/core/storage.py on its own (importing the package would
+start the bot), seeds both backends with the same chat settings and times
+get, get_many and set. The mongo run is skipped when no server answers.
+
+    MONGO_BENCH_URI=mongodb://localhost:27017 python benchmarks/storage.py
+"""
+
+import asyncio
+import importlib.util
+import os
+import random
+import statistics
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URI = os.getenv("MONGO_BENCH_URI", "mongodb://localhost:27017")
+CHATS = int(os.getenv("BENCH_CHATS", 20000))
+OPS = int(os.getenv("BENCH_OPS", 2000))
+
+spec = importlib.util.spec_from_file_location(
+    "storage", os.path.join(ROOT, "AnonXMusic", "core", "storage.py")
+)
+storage = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(storage)
+
+
+def summary(samples: list) -> str:
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    return f"p50 {statistics.median(samples) * 1000:8.1f} us  p99 {p99 * 1000:8.1f} us"
+
+
+async def timed(func, args_list) -> list:
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        await func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run(backend):
+    chat_ids = [-1001000000000 - i for i in range(CHATS)]
+    for chat_id in chat_ids:
+        await backend.set("chat_settings", chat_id, {"lang": "en", "upvotes": 5})
+    gets = [("chat_settings", random.choice(chat_ids)) for _ in range(OPS)]
+    batches = [
+        ("chat_settings", random.sample(chat_ids, 100)) for _ in range(OPS // 20)
+    ]
+    sets = [
+        ("chat_settings", random.choice(chat_ids), {"playmode": "Inline"})
+        for _ in range(OPS)
+    ]
+    print(f"{backend.name:<7} get       {summary(await timed(backend.get, gets))}")
+    print(f"{'':<7} get_many  {summary(await timed(backend.get_many, batches))}")
+    print(f"{'':<7} set       {summary(await timed(backend.set, sets))}\n")
+
+
+async def main():
+    print(f"{CHATS} chats, {OPS} operations per run\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = storage.SQLiteStorage(os.path.join(tmp, "bench.sqlite3"))
+        try:
+            await run(backend)
+        finally:
+            await backend.close()
+
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        return print("motor is not installed, skipping mongo.")
+    client = AsyncIOMotorClient(URI, serverSelectionTimeoutMS=2000)
+    database = client[f"anon_bench_{os.getpid()}"]
+    try:
+        await client.admin.command("ping")
+    except Exception as e:
+        client.close()
+        return print(f"No mongo server at {URI}, skipping: {e}")
+    try:
+        await run(storage.MongoStorage(database))
+    finally:
+        await client.drop_database(database.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
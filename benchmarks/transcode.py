@@ -0,0 +1,111 @@
+"""ffmpeg CPU time per stream, playing the raw download vs the canonical wav.
+
+Runs the decode pytgcalls runs for an audio stream (s16le, mono, 48 kHz to
+a pipe) on a downloaded file and on its canonical copy from
+AnonXMusic/utils/stream/transcode.py, for a whole play and for seeks, and
+reports the CPU time ffmpeg used. Without BENCH_FILE a 10 minute opus track,
+like most YouTube downloads, is generated first. Needs ffmpeg on PATH.
+
+    BENCH_FILE=downloads/<id>.webm python benchmarks/transcode.py
+"""
+
+import os
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+
+FILE = os.getenv("BENCH_FILE")
+RUNS = int(os.getenv("BENCH_RUNS", 3))
+SEEKS = int(os.getenv("BENCH_SEEKS", 5))
+SECONDS = int(os.getenv("BENCH_SECONDS", 600))
+
+# Same as CANONICAL in AnonXMusic/utils/stream/transcode.py.
+CANONICAL = ["-vn", "-ac", "1", "-ar", "48000", "-c:a", "pcm_s16le", "-f", "wav"]
+
+
+def ffmpeg(*args) -> float:
+    # CPU seconds (user + system) the ffmpeg run took.
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", *args],
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+
+def play(path: str, position: int = 0, length: int = None) -> float:
+    # What pytgcalls 0.9 spawns for AudioPiped, minus the realtime pacing.
+    args = ["-ss", str(position)] if position else []
+    args += ["-i", path]
+    if length:
+        args += ["-t", str(length)]
+    return ffmpeg(*args, "-f", "s16le", "-ac", "1", "-ar", "48000", "pipe:1")
+
+
+def duration(path: str) -> float:
+    out = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip())
+
+
+def measure(name: str, path: str, length: float):
+    plays = [play(path) for _ in range(RUNS)]
+    positions = [int(length * (i + 1) / (SEEKS + 1)) for i in range(SEEKS)]
+    seeks = [play(path, position, 10) for position in positions]
+    per_minute = statistics.mean(plays) / (length / 60)
+    print(
+        f"{name:<22} {statistics.mean(plays):8.3f} s  {per_minute * 1000:8.1f} ms/min"
+        f"  {statistics.mean(seeks) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = FILE
+        if not source:
+            source = os.path.join(tmp, "track.webm")
+            ffmpeg(
+                "-f",
+                "lavfi",
+                "-i",
+                f"sine=frequency=440:duration={SECONDS}:sample_rate=48000",
+                "-ac",
+                "2",
+                "-c:a",
+                "libopus",
+                "-b:a",
+                "128k",
+                source,
+            )
+        length = duration(source)
+        canonical = os.path.join(tmp, "canonical.wav")
+        started = time.perf_counter()
+        cost = ffmpeg("-i", source, *CANONICAL, canonical)
+        elapsed = time.perf_counter() - started
+        print(f"{os.path.basename(source)}, {length:.0f}s, {RUNS} plays, {SEEKS} seeks\n")
+        print(f"one-time transcode: {cost:.3f} s CPU, {elapsed:.2f} s wall, ", end="")
+        print(f"{os.path.getsize(source) >> 20} MB -> {os.path.getsize(canonical) >> 20} MB\n")
+        print(f"{'':<22} {'full play':>10}  {'per minute':>13}  {'seek + 10s':>11}")
+        measure("raw download", source, length)
+        measure("canonical wav", canonical, length)
+
+
+if __name__ == "__main__":
+    main()
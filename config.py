@@ -1,5 +1,5 @@
 import re
-from os import getenv
+from os import environ, getenv
 
 from dotenv import load_dotenv
 from pyrogram import filters
@@ -16,8 +16,91 @@ BOT_TOKEN = getenv("BOT_TOKEN")
 # Get your mongo url from cloud.mongodb.com
 MONGO_DB_URI = getenv("MONGO_DB_URI", None)
 
+# Every module shares one pooled mongo client. Timeouts are in seconds,
+# MONGO_COMPRESSORS is a comma separated list of zstd, snappy and zlib
+# (zstd and snappy need the zstandard / python-snappy packages).
+MONGO_MAX_POOL_SIZE = int(getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_TIMEOUT = float(getenv("MONGO_TIMEOUT", 10))
+MONGO_COMPRESSORS = getenv("MONGO_COMPRESSORS", "zlib")
+
 DURATION_LIMIT_MIN = int(getenv("DURATION_LIMIT", 10000))
 
+# "batched" keeps settings writes in memory and flushes them in bulk every
+# DB_FLUSH_INTERVAL seconds, "sync" awaits every write against mongo.
+DB_WRITE_MODE = getenv("DB_WRITE_MODE", "batched").lower()
+DB_FLUSH_INTERVAL = float(getenv("DB_FLUSH_INTERVAL", 2))
+
+# Chat settings kept in memory, entries are reloaded after SETTINGS_CACHE_TTL
+# seconds (0 keeps them until evicted). Set SETTINGS_CHANGE_STREAM to follow
+# changes made by other instances sharing the database (needs a replica set).
+SETTINGS_CACHE_SIZE = int(getenv("SETTINGS_CACHE_SIZE", 100000))
+SETTINGS_CACHE_TTL = int(getenv("SETTINGS_CACHE_TTL", 21600))
+SETTINGS_CHANGE_STREAM = bool(getenv("SETTINGS_CHANGE_STREAM", False))
+
+# Where chat settings are stored: "mongo" or "sqlite" (a local file at
+# SQLITE_PATH, for single box deployments).
+DB_BACKEND = getenv("DB_BACKEND", "mongo").lower()
+SQLITE_PATH = getenv("SQLITE_PATH", "anonx.sqlite3")
+
+# Queues are saved every QUEUE_SNAPSHOT_INTERVAL seconds to "disk" (one file
+# per chat in QUEUE_SNAPSHOT_PATH) or "mongo", and resumed on startup. Set
+# QUEUE_SNAPSHOT to "off" to disable.
+QUEUE_SNAPSHOT = getenv("QUEUE_SNAPSHOT", "disk").lower()
+QUEUE_SNAPSHOT_INTERVAL = float(getenv("QUEUE_SNAPSHOT_INTERVAL", 10))
+QUEUE_SNAPSHOT_PATH = getenv("QUEUE_SNAPSHOT_PATH", "queues")
+
+# The next track is fetched (file or stream url, thumbnail) once the current
+# one has PREROLL_SECONDS left, so switching tracks only swaps the stream.
+# 0 disables.
+PREROLL_SECONDS = int(getenv("PREROLL_SECONDS", 60))
+
+# Queued tracks are downloaded in the background, the next PREFETCH_DEPTH of
+# each chat, closest to playing first, with at most PREFETCH_CONCURRENCY
+# downloads running at once across all chats.
+PREFETCH_DEPTH = int(getenv("PREFETCH_DEPTH", 3))
+PREFETCH_CONCURRENCY = int(getenv("PREFETCH_CONCURRENCY", 2))
+
+# New streams drop to medium quality once host CPU reaches QUALITY_CPU_MEDIUM
+# percent or QUALITY_STREAMS_MEDIUM calls are active, and to low quality at
+# QUALITY_CPU_LOW / QUALITY_STREAMS_LOW. Stream limits of 0 are off.
+QUALITY_CPU_MEDIUM = float(getenv("QUALITY_CPU_MEDIUM", 70))
+QUALITY_CPU_LOW = float(getenv("QUALITY_CPU_LOW", 90))
+QUALITY_STREAMS_MEDIUM = int(getenv("QUALITY_STREAMS_MEDIUM", 0))
+QUALITY_STREAMS_LOW = int(getenv("QUALITY_STREAMS_LOW", 0))
+
+# Speed changes apply at once through ffmpeg filters. With SPEED_PRERENDER
+# the sped up file is also rendered in the background and used for later
+# seeks and restarts of that track.
+SPEED_PRERENDER = bool(getenv("SPEED_PRERENDER", False))
+# Rendered speed files are deleted, least recently used first, once they take
+# more than SPEED_CACHE_SIZE MB. Files a queue still points at are kept.
+SPEED_CACHE_SIZE = int(getenv("SPEED_CACHE_SIZE", 2048))
+
+# Downloaded audio is transcoded once to 48 kHz mono wav in TRANSCODE_PATH,
+# which later plays, seeks and loops of that track decode cheaply. Copies are
+# deleted, least recently used first, past TRANSCODE_CACHE_SIZE MB.
+TRANSCODE_AUDIO = bool(getenv("TRANSCODE_AUDIO", False))
+TRANSCODE_PATH = getenv("TRANSCODE_PATH", "transcoded")
+TRANSCODE_CACHE_SIZE = int(getenv("TRANSCODE_CACHE_SIZE", 4096))
+
+# Downloaded videos get a rendition per quality tier in RENDITION_PATH,
+# scaled once to the call size by at most RENDITION_WORKERS niced ffmpeg
+# runs at a time instead of by ffmpeg on every play and seek. Renditions are
+# deleted, least recently used first, past RENDITION_CACHE_SIZE MB or when
+# the disk has less than RENDITION_MIN_FREE MB left.
+VIDEO_RENDITIONS = bool(getenv("VIDEO_RENDITIONS", False))
+RENDITION_PATH = getenv("RENDITION_PATH", "renditions")
+RENDITION_CACHE_SIZE = int(getenv("RENDITION_CACHE_SIZE", 8192))
+RENDITION_MIN_FREE = int(getenv("RENDITION_MIN_FREE", 1024))
+RENDITION_WORKERS = int(getenv("RENDITION_WORKERS", 1))
+
+# Stream urls resolved by yt-dlp are reused, up to URL_CACHE_SIZE of them,
+# until they expire in less than URL_REFRESH_MARGIN seconds. Those of queued
+# tracks are resolved again in the background before that.
+URL_CACHE_SIZE = int(getenv("URL_CACHE_SIZE", 1000))
+URL_REFRESH_MARGIN = int(getenv("URL_REFRESH_MARGIN", 1800))
+
 # Chat id of a group for logging bot's activities
 LOGGER_ID = int(getenv("LOGGER_ID", -1002030443562))
 
@@ -66,11 +149,34 @@ TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 1073741824))
 
 
 # Get your pyrogram v2 session from @StringFatherBot on Telegram
-STRING1 = getenv("STRING_SESSION", None)
-STRING2 = getenv("STRING_SESSION2", None)
-STRING3 = getenv("STRING_SESSION3", None)
-STRING4 = getenv("STRING_SESSION4", None)
-STRING5 = getenv("STRING_SESSION5", None)
+# Any number of assistants: STRING_SESSION, STRING_SESSION2, STRING_SESSION3...
+# keyed by their number.
+STRING_SESSIONS = {}
+for _key, _value in environ.items():
+    _match = re.fullmatch(r"STRING_SESSION(\d*)", _key)
+    if _match and _value:
+        _number = int(_match.group(1) or 1)
+        if _number == 0:
+            raise SystemExit(
+                f"[ERROR] - {_key} is not a valid assistant, numbers start at 1 (STRING_SESSION or STRING_SESSION1)."
+            )
+        if _number in STRING_SESSIONS:
+            raise SystemExit(
+                f"[ERROR] - {_key} is assistant {_number} twice, set only one of STRING_SESSION and STRING_SESSION1."
+            )
+        STRING_SESSIONS[_number] = _value
+STRING_SESSIONS = dict(sorted(STRING_SESSIONS.items()))
+
+# New chats go to the assistant with the fewest active calls. The weights add
+# to that count per ms of ping and per FloodWait in the last 10 minutes. Idle
+# chats move to another assistant once theirs carries ASSISTANT_REBALANCE_MARGIN
+# more calls than the least loaded one (0 never moves them).
+ASSISTANT_PING_WEIGHT = float(getenv("ASSISTANT_PING_WEIGHT", 0))
+ASSISTANT_FLOOD_WEIGHT = float(getenv("ASSISTANT_FLOOD_WEIGHT", 0))
+ASSISTANT_REBALANCE_MARGIN = int(getenv("ASSISTANT_REBALANCE_MARGIN", 2))
+
+# How many assistants log in at the same time on startup.
+ASSISTANT_START_CONCURRENCY = int(getenv("ASSISTANT_START_CONCURRENCY", 3))
 
 
 BANNED_USERS = filters.user()